@@ -19,18 +19,20 @@ import json
 import os
 import sys
 import tempfile
+from pathlib import Path
 
 # Allow importing from scripts when run from repo root
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
 
 from scripts.cosmos_transfer import call_cosmos_transfer, image_to_video
 
 
-def resolve_path(path: str, root: str) -> str:
+def resolve_path(path: str | Path, root: Path) -> Path:
     """Return absolute path; if path is relative, join with root."""
-    return path if os.path.isabs(path) else os.path.join(root, path)
+    p = Path(path)
+    return p if p.is_absolute() else root / p
 
 
 def main():
@@ -58,7 +60,7 @@ def main():
         sys.exit(1)
 
     config_path = resolve_path(args.input, PROJECT_ROOT)
-    if not os.path.isfile(config_path):
+    if not config_path.is_file():
         print(f"Error: Config not found: {config_path}", file=sys.stderr)
         sys.exit(1)
 
@@ -75,18 +77,18 @@ def main():
         print("Error: config must set 'prompt'", file=sys.stderr)
         sys.exit(1)
 
-    video_abs = resolve_path(video_path, PROJECT_ROOT) if video_path else ""
-    image_abs = resolve_path(image_context_path, PROJECT_ROOT) if image_context_path else ""
+    video_abs = resolve_path(video_path, PROJECT_ROOT) if video_path else None
+    image_abs = resolve_path(image_context_path, PROJECT_ROOT) if image_context_path else None
 
     # Use existing video if present; otherwise build video from image
-    if video_path and os.path.isfile(video_abs):
-        input_video = video_abs
+    if video_abs is not None and video_abs.is_file():
+        input_video = str(video_abs)
         print(f"Using input video: {input_video}")
-    elif image_context_path and os.path.isfile(image_abs):
+    elif image_abs is not None and image_abs.is_file():
         with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
             input_video = tmp.name
         try:
-            image_to_video(image_abs, input_video)
+            image_to_video(str(image_abs), input_video)
         except Exception as e:
             if os.path.exists(input_video):
                 os.unlink(input_video)
@@ -103,14 +105,14 @@ def main():
         video_bytes = call_cosmos_transfer(input_video, prompt, api_key, seed=seed)
 
         output_dir = resolve_path(args.output_dir, PROJECT_ROOT)
-        os.makedirs(output_dir, exist_ok=True)
+        output_dir.mkdir(parents=True, exist_ok=True)
         out_name = f"{name}.mp4" if name else "result.mp4"
-        output_path = os.path.join(output_dir, out_name)
+        output_path = output_dir / out_name
         with open(output_path, "wb") as f:
             f.write(video_bytes)
         print(f"\nSaved: {output_path}")
     finally:
-        if input_video != video_abs and os.path.exists(input_video):
+        if input_video != str(video_abs) and os.path.exists(input_video):
             os.unlink(input_video)
 
 
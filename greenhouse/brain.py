@@ -5,10 +5,15 @@ Sets fan, vent, and water_valve from environment and zone state.
 Does not overwrite other state fields.
 """
 
+# (fan, vent) per temperature/humidity regime
+_HOT_PRESET = (0.7, 0.4)   # temp > 26 or humidity > 75
+_COLD_PRESET = (0.1, 0.0)  # temp < 18
+
 
 def step(state: dict) -> None:
     """
     Apply controller rules to state["actuators"]. Modifies state in place.
+    Expects a state normalized by simulate.load_state (all keys present).
 
     Rules:
     - If temp > 26 OR humidity > 75: fan=0.7, vent=0.4
@@ -20,27 +25,19 @@ def step(state: dict) -> None:
     zones = state["zones"]
     actuators = state["actuators"]
 
-    temp = env.get("temperature_c", 22.0)
-    humidity = env.get("humidity_percent", 50.0)
+    temp = env["temperature_c"]
+    humidity = env["humidity_percent"]
 
     # Temperature and humidity rules
     if temp > 26 or humidity > 75:
-        actuators["fan"] = 0.7
-        actuators["vent"] = 0.4
+        actuators["fan"], actuators["vent"] = _HOT_PRESET
     elif temp < 18:
-        actuators["fan"] = 0.1
-        actuators["vent"] = 0.0
+        actuators["fan"], actuators["vent"] = _COLD_PRESET
     else:
-        # Middle band: leave fan/vent as-is or set mild defaults
-        if "fan" not in actuators or actuators["fan"] is None:
-            actuators["fan"] = 0.0
-        if "vent" not in actuators or actuators["vent"] is None:
-            actuators["vent"] = 0.0
-
-    # Clamp fan and vent to [0, 1]
-    actuators["fan"] = max(0.0, min(1.0, float(actuators["fan"])))
-    actuators["vent"] = max(0.0, min(1.0, float(actuators["vent"])))
+        # Middle band: leave fan/vent as-is and clamp to [0, 1]
+        actuators["fan"] = min(1.0, max(0.0, float(actuators["fan"])))
+        actuators["vent"] = min(1.0, max(0.0, float(actuators["vent"])))
 
     # Water rule: any zone dry -> open valve
-    any_dry = any(z.get("soil_moisture", 0.5) < 0.30 for z in zones)
+    any_dry = any(z["soil_moisture"] < 0.30 for z in zones)
     actuators["water_valve"] = any_dry
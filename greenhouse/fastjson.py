@@ -0,0 +1,24 @@
+"""
+JSON encode/decode for the simulation hot path.
+
+Uses orjson when installed (pip install orjson); otherwise falls back to the
+stdlib json module with compact separators. dumps() always returns bytes.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+else:
+    def dumps(obj) -> bytes:
+        """Serialize obj to compact JSON bytes."""
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    loads = json.loads
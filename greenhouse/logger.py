@@ -1,14 +1,32 @@
 """
 Append each timestep state as one JSON line to history.jsonl.
+
+The history file is opened once per run with a large write buffer; callers
+pass the open handle to log_step and call flush() periodically.
 """
 
-import json
 from pathlib import Path
+from typing import IO
+
+from fastjson import dumps
+
+# Write buffer for the history file (1 MiB); coalesces many small step writes.
+HISTORY_BUFFER_SIZE = 1 << 20
+
 
+def open_history(history_path: Path) -> IO[bytes]:
+    """Open history_path for binary appending with a large write buffer."""
+    return open(history_path, "ab", buffering=HISTORY_BUFFER_SIZE)
 
-def log_step(history_path: Path, state: dict) -> None:
+
+def log_step(handle: IO[bytes], state: dict) -> None:
     """
-    Append state (after controller) as a single JSON line to history_path.
+    Append state (after controller) as a single JSON line to the open history handle.
     """
-    with open(history_path, "a") as f:
-        f.write(json.dumps(state) + "\n")
+    handle.write(dumps(state))
+    handle.write(b"\n")
+
+
+def flush(handle: IO[bytes]) -> None:
+    """Flush buffered history lines to disk."""
+    handle.flush()
@@ -5,18 +5,35 @@ CLI runner: execute N simulation steps (simulate -> brain -> log).
 Usage:
   python greenhouse/run_loop.py --steps 5
   python greenhouse/run_loop.py --steps 20 --sleep 1 --state greenhouse/greenhouse_state.json
+  python greenhouse/run_loop.py --steps 10000 --checkpoint-every 100
+  python greenhouse/run_loop.py --reset --state /tmp/bench_state.pkl   # binary state file
   python greenhouse/run_loop.py --reset
 """
 
 import argparse
+import copy
 import json
+import pickle
 import sys
 import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import IO
 
 from brain import step as brain_step
-from logger import log_step
-from simulate import load_state, save_state, step as simulate_step
+from logger import flush as flush_history, log_step, open_history
+from simulate import is_binary_state, load_state, save_state, step as simulate_step
+
+# USD sync is optional (needs usd-core); usd_init exits with a hint when pxr is missing
+try:
+    from usd_init import ensure_stage
+    from usd_sync import sync as usd_sync
+except SystemExit as e:
+    ensure_stage = usd_sync = None
+    USD_UNAVAILABLE = str(e)
+else:
+    USD_UNAVAILABLE = ""
 
 # Default state path relative to this file
 GREENHOUSE_DIR = Path(__file__).resolve().parent
@@ -24,6 +41,11 @@ DEFAULT_STATE_PATH = GREENHOUSE_DIR / "greenhouse_state.json"
 DEFAULT_HISTORY_PATH = GREENHOUSE_DIR / "history.jsonl"
 DEFAULT_USD_PATH = GREENHOUSE_DIR / "live_state.usda"
 
+# Flush buffered history lines at least every N steps
+HISTORY_FLUSH_EVERY = 50
+# Save live_state.usda to disk every N steps (and always on the last step)
+USD_SAVE_EVERY = 10
+
 INITIAL_STATE = {
     "timestamp": "2026-02-14T12:00:00.000000Z",
     "environment": {
@@ -47,46 +69,103 @@ INITIAL_STATE = {
 
 def reset_state(state_path: Path) -> None:
     """Restore initial greenhouse state to state_path."""
-    with open(state_path, "w") as f:
-        json.dump(INITIAL_STATE, f, indent=2)
-        f.write("\n")
+    save_state(state_path, INITIAL_STATE, indent=2)
     print(f"Reset state to {state_path}")
 
 
+def _persist(
+    state: dict,
+    state_path: Path,
+    history: IO[bytes],
+    flush: bool,
+    checkpoint: bool,
+    sync: Callable[..., dict] | None,
+    usd_path: Path | None,
+    save_usd: bool,
+) -> None:
+    """
+    Write one step's state: history line, and on checkpoint steps the state file
+    [and usd sync]. Runs on the writer thread.
+    """
+    log_step(history, state)
+    if flush:
+        flush_history(history)
+    if checkpoint:
+        save_state(state_path, state)
+        if sync is not None:
+            sync(state_path=state_path, usd_path=usd_path, save=save_usd)
+
+
 def run_loop(
     state_path: Path,
     history_path: Path,
     steps: int,
     sleep_sec: float,
     usd_path: Path | None = None,
+    checkpoint_every: int = 1,
 ) -> None:
-    """Run steps: load -> simulate -> brain -> log [-> usd_sync if usd_path]; print status each step."""
+    """
+    Run steps: load -> simulate -> brain -> log [-> usd_sync if usd_path]; print status each step.
+
+    Every step is appended to history; the state file (and USD, if enabled) is
+    only written every checkpoint_every steps and on the last step.
+
+    Persisting a step (state file, history, USD) runs on a single writer thread
+    from a snapshot of the state, so it overlaps with computing the next step.
+    At most one write is in flight; its errors are raised in the loop.
+    """
+    if checkpoint_every < 1:
+        raise ValueError(f"checkpoint_every must be >= 1, got {checkpoint_every}")
+
+    sync = None
     if usd_path is not None:
-        from usd_init import ensure_stage
+        if usd_sync is None:
+            raise RuntimeError(USD_UNAVAILABLE)
         ensure_stage(usd_path)
+        sync = usd_sync
+    usd_save_every = USD_SAVE_EVERY * checkpoint_every
 
     state = load_state(state_path)
-    for i in range(steps):
-        simulate_step(state, state_path=None)
-        brain_step(state)
-        save_state(state_path, state)
-        log_step(history_path, state)
-
-        if usd_path is not None:
-            from usd_sync import sync
-            sync(state_path=state_path, usd_path=usd_path)
-            print(f"  usd updated: {usd_path}")
-
-        env = state["environment"]
-        act = state["actuators"]
-        ts = state["timestamp"]
-        print(
-            f"step {i+1}/{steps}  {ts}  "
-            f"temp={env['temperature_c']:.1f}C  humidity={env['humidity_percent']:.0f}%  "
-            f"fan={act['fan']:.2f}  vent={act['vent']:.2f}  water_valve={act['water_valve']}"
-        )
-        if i < steps - 1 and sleep_sec > 0:
-            time.sleep(sleep_sec)
+    with open_history(history_path) as history, ThreadPoolExecutor(max_workers=1) as writer:
+        pending: Future | None = None
+        pending_usd = False  # whether the in-flight write saves the USD layer
+
+        def wait_pending() -> None:
+            # Only report the USD save once the writer has actually completed it
+            pending.result()
+            if pending_usd:
+                print(f"  usd saved: {usd_path}")
+
+        for i in range(steps):
+            simulate_step(state)
+            brain_step(state)
+
+            sleeping = i < steps - 1 and sleep_sec > 0
+            # Make history visible to readers before idling
+            flush = sleeping or (i + 1) % HISTORY_FLUSH_EVERY == 0
+            last = i == steps - 1
+            checkpoint = last or (i + 1) % checkpoint_every == 0
+            save_usd = checkpoint and (last or (i + 1) % usd_save_every == 0)
+            snapshot = copy.deepcopy(state)
+            if pending is not None:
+                wait_pending()
+            pending = writer.submit(
+                _persist, snapshot, state_path, history, flush, checkpoint, sync, usd_path, save_usd
+            )
+            pending_usd = usd_path is not None and save_usd
+
+            env = state["environment"]
+            act = state["actuators"]
+            ts = state["timestamp"]
+            print(
+                f"step {i+1}/{steps}  {ts}  "
+                f"temp={env['temperature_c']:.1f}C  humidity={env['humidity_percent']:.0f}%  "
+                f"fan={act['fan']:.2f}  vent={act['vent']:.2f}  water_valve={act['water_valve']}"
+            )
+            if sleeping:
+                time.sleep(sleep_sec)
+        if pending is not None:
+            wait_pending()
 
 
 def main() -> int:
@@ -97,7 +176,7 @@ def main() -> int:
         "--state",
         type=Path,
         default=DEFAULT_STATE_PATH,
-        help="Path to greenhouse_state.json",
+        help="Path to greenhouse_state.json (.pkl/.pickle: binary pickle state)",
     )
     parser.add_argument(
         "--history",
@@ -105,6 +184,13 @@ def main() -> int:
         default=DEFAULT_HISTORY_PATH,
         help="Path to history.jsonl",
     )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Write the state file (and USD) every N steps; history still gets every step",
+    )
     parser.add_argument(
         "--reset",
         action="store_true",
@@ -133,10 +219,23 @@ def main() -> int:
         return 1
 
     usd_path = DEFAULT_USD_PATH.resolve() if args.usd else None
+    if usd_path is not None and usd_sync is None:
+        print(f"Error: {USD_UNAVAILABLE}", file=sys.stderr)
+        return 1
+    if usd_path is not None and is_binary_state(state_path):
+        print("Error: --usd requires a JSON state file", file=sys.stderr)
+        return 1
 
     try:
-        run_loop(state_path, history_path, args.steps, args.sleep, usd_path=usd_path)
-    except (IOError, json.JSONDecodeError, KeyError) as e:
+        run_loop(
+            state_path,
+            history_path,
+            args.steps,
+            args.sleep,
+            usd_path=usd_path,
+            checkpoint_every=args.checkpoint_every,
+        )
+    except (IOError, json.JSONDecodeError, pickle.UnpicklingError, KeyError, ValueError) as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
     return 0
@@ -1,23 +1,58 @@
 """
 Greenhouse state simulation: sensor drift, soil drying, and watering effect.
 
-Uses only Python 3.10+ stdlib. Modifies state in place; keeps all values bounded.
+Uses only Python 3.10+ stdlib (orjson is used for state I/O when installed).
+Modifies state in place; keeps all values bounded.
 """
 
 import json
+import os
+import pickle
 import random
-from datetime import datetime, timezone
+import time
+from collections.abc import Iterator
 from pathlib import Path
 
+from fastjson import dumps, loads
+
 
 # Bounds and drift parameters
 TEMP_DRIFT = 0.3
 HUMIDITY_DRIFT = 1.5
+CO2_DRIFT = 5.0
+LIGHT_DRIFT = 100.0
 SOIL_DRY_RATE = 0.008
 SOIL_WET_GAIN = 0.15
 RANDOM_SEED = 42
 
-random.seed(RANDOM_SEED)
+# State schema: required environment keys and defaults for optional fields
+REQUIRED_ENVIRONMENT = ("temperature_c", "humidity_percent")
+ENVIRONMENT_DEFAULTS = {"co2_ppm": 420.0, "light_lux": 8000.0}
+ACTUATOR_DEFAULTS = {"fan": 0.0, "vent": 0.0, "water_valve": False}
+
+# State files with these suffixes are stored with pickle instead of JSON: no text
+# formatting or parsing, for long benchmark runs. Only load pickle files you wrote.
+BINARY_STATE_SUFFIXES = (".pkl", ".pickle")
+
+# Environment drift is drawn NOISE_CHUNK steps at a time
+NOISE_CHUNK = 1024
+_DRIFT_SCALES = (TEMP_DRIFT, HUMIDITY_DRIFT, CO2_DRIFT, LIGHT_DRIFT)
+
+
+def _drift_rows(rng: random.Random) -> Iterator[tuple[float, ...]]:
+    """
+    Yield per-step (temp, humidity, co2, light) drifts, each uniform in [-scale, scale].
+
+    Draws with uniform() in the same per-step order as the original random.uniform calls,
+    so a given seed reproduces the old sequence exactly.
+    """
+    uniform = rng.uniform
+    scales = _DRIFT_SCALES
+    while True:
+        yield from [tuple(uniform(-s, s) for s in scales) for _ in range(NOISE_CHUNK)]
+
+
+_drift = _drift_rows(random.Random(RANDOM_SEED))
 
 
 def _clamp(value: float, low: float, high: float) -> float:
@@ -25,70 +60,108 @@ def _clamp(value: float, low: float, high: float) -> float:
     return max(low, min(high, value))
 
 
-def _load_state(path: Path) -> dict:
-    """Load state from JSON file."""
-    with open(path, "r") as f:
-        return json.load(f)
+def _utc_timestamp() -> str:
+    """Current UTC time as ISO 8601 with microseconds and a Z suffix."""
+    sec, ns = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec)) + f".{ns // 1000:06d}Z"
+
 
+def is_binary_state(path: Path) -> bool:
+    """True if path is a pickle state file (by suffix) rather than JSON."""
+    return path.suffix in BINARY_STATE_SUFFIXES
 
-def _save_state(path: Path, state: dict) -> None:
-    """Save state to JSON file."""
-    with open(path, "w") as f:
-        json.dump(state, f, indent=2)
-        f.write("\n")
+
+def _load_state(path: Path) -> dict:
+    """Load state from JSON file (or pickle file, see BINARY_STATE_SUFFIXES)."""
+    data = path.read_bytes()
+    if is_binary_state(path):
+        return pickle.loads(data)
+    return loads(data)
 
 
-def step(state: dict, state_path: Path | None = None) -> None:
+def _save_state(path: Path, state: dict, indent: int | None = None) -> None:
     """
-    Advance simulation one step: drift env, dry soil, apply watering if valve is on.
+    Save state to JSON file (compact unless indent is given), or to a pickle
+    file if path has a binary suffix (indent is then ignored).
 
-    Modifies state in place. If state_path is given, reads from file first and
-    writes back after (caller can pass state without path for in-memory only).
+    Writes a sibling .tmp file and renames it over path, so readers never see
+    a partially written state.
     """
-    if state_path is not None:
-        state.clear()
-        state.update(_load_state(state_path))
+    if is_binary_state(path):
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    elif indent is None:
+        data = dumps(state) + b"\n"
+    else:
+        data = json.dumps(state, indent=indent).encode() + b"\n"
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def step(state: dict) -> None:
+    """
+    Advance simulation one step: drift env, dry soil, apply watering if valve is on.
 
-    state["timestamp"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    Modifies state in place; persistence is up to the caller (see load_state/save_state).
+    """
+    state["timestamp"] = _utc_timestamp()
 
     env = state["environment"]
     zones = state["zones"]
     actuators = state["actuators"]
 
     # Drift temperature and humidity
-    env["temperature_c"] = _clamp(
-        env["temperature_c"] + random.uniform(-TEMP_DRIFT, TEMP_DRIFT),
-        10.0,
-        40.0,
-    )
-    env["humidity_percent"] = _clamp(
-        env["humidity_percent"] + random.uniform(-HUMIDITY_DRIFT, HUMIDITY_DRIFT),
-        0.0,
-        100.0,
-    )
+    d_temp, d_humidity, d_co2, d_light = next(_drift)
+    env["temperature_c"] = _clamp(env["temperature_c"] + d_temp, 10.0, 40.0)
+    env["humidity_percent"] = _clamp(env["humidity_percent"] + d_humidity, 0.0, 100.0)
     # Optional: slight drift for co2 and light (keep bounded)
-    env["co2_ppm"] = _clamp(env.get("co2_ppm", 420) + random.uniform(-5, 5), 300, 2000)
-    env["light_lux"] = _clamp(env.get("light_lux", 8000) + random.uniform(-100, 100), 0, 50000)
+    env["co2_ppm"] = _clamp(env["co2_ppm"] + d_co2, 300, 2000)
+    env["light_lux"] = _clamp(env["light_lux"] + d_light, 0, 50000)
 
-    # Soil drying and watering
-    water_valve = actuators.get("water_valve", False)
+    # Soil drying and watering (clamps inlined: this loop runs once per zone)
+    water_valve = actuators["water_valve"]
+    wet_gain = SOIL_WET_GAIN if water_valve else 0.0
     for zone in zones:
-        zone["soil_moisture"] = _clamp(zone["soil_moisture"] - SOIL_DRY_RATE, 0.0, 1.0)
-        if water_valve:
-            zone["soil_moisture"] = _clamp(zone["soil_moisture"] + SOIL_WET_GAIN, 0.0, 1.0)
+        moisture = zone["soil_moisture"] - SOIL_DRY_RATE
+        if moisture < 0.0:
+            moisture = 0.0
+        moisture += wet_gain
+        zone["soil_moisture"] = 1.0 if moisture > 1.0 else moisture
     # After applying watering, turn valve off (one-shot per step)
     if water_valve:
         actuators["water_valve"] = False
 
-    if state_path is not None:
-        _save_state(state_path, state)
+
+def _normalize_state(state: dict) -> dict:
+    """
+    Check required fields and fill optional ones with defaults, in place, so
+    step() and brain.step() can index keys directly. Raises KeyError if a
+    required field is missing.
+    """
+    env = state["environment"]
+    for key in REQUIRED_ENVIRONMENT:
+        if key not in env:
+            raise KeyError(f"environment.{key}")
+    for key, default in ENVIRONMENT_DEFAULTS.items():
+        env.setdefault(key, default)
+
+    actuators = state.setdefault("actuators", {})
+    for key, default in ACTUATOR_DEFAULTS.items():
+        if actuators.get(key) is None:
+            actuators[key] = default
+
+    for i, zone in enumerate(state["zones"]):
+        if "soil_moisture" not in zone:
+            raise KeyError(f"zones[{i}].soil_moisture")
+    return state
 
 
 def load_state(path: Path) -> dict:
-    """Load full state from JSON file."""
-    return _load_state(path)
+    """Load full state from JSON file, with optional fields filled in."""
+    return _normalize_state(_load_state(path))
 
 
-def save_state(path: Path, state: dict) -> None:
-    """Write state to JSON file."""
-    _save_state(path, state)
+def save_state(path: Path, state: dict, indent: int | None = None) -> None:
+    """Write state to JSON file (compact by default; pass indent for readable output)."""
+    _save_state(path, state, indent=indent)
@@ -3,10 +3,15 @@ Read greenhouse_state.json and write values into live_state.usda.
 
 Idempotent: safe to run every step. Creates attributes if missing.
 Returns a small dict of what was updated for debugging.
+
+The opened stage is cached per USD path and reused across calls, together with
+the attribute handles it writes; the layer is only written to disk when sync()
+is called with save=True.
 """
 
-import json
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Callable
 
 try:
     from pxr import Sdf, Usd
@@ -15,6 +20,7 @@ except ImportError as e:
         "pxr (OpenUSD) not found. Install with: pip install usd-core"
     ) from e
 
+from fastjson import loads
 from usd_init import (
     ACTUATORS,
     BED_1,
@@ -26,21 +32,121 @@ from usd_init import (
     GREENHOUSE_DIR,
 )
 
+# Open stages keyed by resolved USD path; kept alive across sync() calls.
+_STAGE_CACHE: dict[str, Usd.Stage] = {}
+
+
+def _health_label(value: Any) -> str:
+    """health: JSON may be number or string."""
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+# (JSON key, USD type, converter, default) per prim group
+ENVIRONMENT_FIELDS = (
+    ("temperature_c", Sdf.ValueTypeNames.Double, float, 22),
+    ("humidity_percent", Sdf.ValueTypeNames.Double, float, 55),
+    ("co2_ppm", Sdf.ValueTypeNames.Double, float, 420),
+    ("light_lux", Sdf.ValueTypeNames.Double, float, 8000),
+)
+ACTUATOR_FIELDS = (
+    ("fan", Sdf.ValueTypeNames.Double, float, 0),
+    ("vent", Sdf.ValueTypeNames.Double, float, 0),
+    ("water_valve", Sdf.ValueTypeNames.Bool, bool, False),
+)
+ZONE_FIELDS = (
+    ("crop", Sdf.ValueTypeNames.String, str, "lettuce"),
+    ("soil_moisture", Sdf.ValueTypeNames.Double, float, 0.5),
+    ("plant_height_cm", Sdf.ValueTypeNames.Double, float, 12),
+    ("health", Sdf.ValueTypeNames.String, _health_label, "0.9"),
+)
+BED_PATHS = (BED_1, BED_2, BED_3)
+
+# (JSON key, converter, default, attribute handle)
+_Binding = tuple[str, Callable[[Any], Any], Any, Usd.Attribute]
+
+
+@dataclass
+class _Attrs:
+    """Attribute handles resolved once per stage; sync() only calls Set on them."""
+
+    timestamp: Usd.Attribute | None = None
+    environment: list[_Binding] = field(default_factory=list)
+    actuators: list[_Binding] = field(default_factory=list)
+    beds: list[list[_Binding]] = field(default_factory=list)
 
-def _set_attr(prim: Usd.Prim, name: str, type_name: Sdf.ValueTypeName, value) -> bool:
-    """Set attribute; create if missing. Returns True if set."""
+
+# Resolved attribute handles keyed by resolved USD path (same keys as _STAGE_CACHE).
+_ATTR_CACHE: dict[str, _Attrs] = {}
+
+
+def _get_stage(usd_path: Path) -> Usd.Stage:
+    """Return the cached stage for usd_path, opening it on first use."""
+    key = str(usd_path)
+    stage = _STAGE_CACHE.get(key)
+    if stage is None:
+        stage = Usd.Stage.Open(key)
+        if not stage:
+            raise RuntimeError(f"Could not open stage: {usd_path}")
+        _STAGE_CACHE[key] = stage
+    return stage
+
+
+def _get_attr(prim: Usd.Prim, name: str, type_name: Sdf.ValueTypeName) -> Usd.Attribute | None:
+    """Return attribute; create if missing. Returns None if it cannot be created."""
     attr = prim.GetAttribute(name)
     if not attr:
         attr = prim.CreateAttribute(name, type_name)
-    if not attr:
-        return False
-    attr.Set(value)
-    return True
-
-
-def sync(state_path: str | Path | None = None, usd_path: str | Path | None = None) -> dict:
+    return attr if attr else None
+
+
+def _bind_fields(prim: Usd.Prim, fields: tuple) -> list[_Binding]:
+    """Resolve attribute handles for fields on prim; missing prims yield no bindings."""
+    if not prim:
+        return []
+    bindings = []
+    for key, type_name, convert, default in fields:
+        attr = _get_attr(prim, key, type_name)
+        if attr is not None:
+            bindings.append((key, convert, default, attr))
+    return bindings
+
+
+def _get_attrs(usd_path: Path) -> _Attrs:
+    """Return the cached attribute handles for usd_path, resolving them on first use."""
+    key = str(usd_path)
+    attrs = _ATTR_CACHE.get(key)
+    if attrs is None:
+        stage = _get_stage(usd_path)
+        attrs = _Attrs()
+        gh = stage.GetPrimAtPath(GREENHOUSE)
+        if gh:
+            attrs.timestamp = _get_attr(gh, "timestamp", Sdf.ValueTypeNames.String)
+        attrs.environment = _bind_fields(stage.GetPrimAtPath(ENVIRONMENT), ENVIRONMENT_FIELDS)
+        attrs.actuators = _bind_fields(stage.GetPrimAtPath(ACTUATORS), ACTUATOR_FIELDS)
+        attrs.beds = [_bind_fields(stage.GetPrimAtPath(p), ZONE_FIELDS) for p in BED_PATHS]
+        _ATTR_CACHE[key] = attrs
+    return attrs
+
+
+def _write(bindings: list[_Binding], values: dict) -> int:
+    """Set each bound attribute from values; return count of attributes set."""
+    count = 0
+    for key, convert, default, attr in bindings:
+        if attr.Set(convert(values.get(key, default))):
+            count += 1
+    return count
+
+
+def sync(
+    state_path: str | Path | None = None,
+    usd_path: str | Path | None = None,
+    save: bool = False,
+) -> dict:
     """
     Read JSON state from state_path and write to usd_path.
+    The root layer is saved to disk only if save is True.
     Returns dict with keys like "environment", "actuators", "zones" and count of updated attrs.
     """
     state_path = Path(state_path or GREENHOUSE_DIR / "greenhouse_state.json").resolve()
@@ -49,73 +155,36 @@ def sync(state_path: str | Path | None = None, usd_path: str | Path | None = Non
     if not state_path.exists():
         raise FileNotFoundError(f"State file not found: {state_path}")
 
-    with open(state_path) as f:
-        state = json.load(f)
+    state = loads(state_path.read_bytes())
 
-    stage = Usd.Stage.Open(str(usd_path))
-    if not stage:
-        raise RuntimeError(f"Could not open stage: {usd_path}")
+    attrs = _get_attrs(usd_path)
 
     updated = {"environment": 0, "actuators": 0, "zones": 0, "timestamp": False}
 
-    # Timestamp on Greenhouse
-    gh = stage.GetPrimAtPath(GREENHOUSE)
-    if gh and _set_attr(gh, "timestamp", Sdf.ValueTypeNames.String, state.get("timestamp", "")):
-        updated["timestamp"] = True
-
-    # Environment
-    env = stage.GetPrimAtPath(ENVIRONMENT)
-    if env:
-        e = state.get("environment", {})
-        if _set_attr(env, "temperature_c", Sdf.ValueTypeNames.Double, float(e.get("temperature_c", 22))):
-            updated["environment"] += 1
-        if _set_attr(env, "humidity_percent", Sdf.ValueTypeNames.Double, float(e.get("humidity_percent", 55))):
-            updated["environment"] += 1
-        if _set_attr(env, "co2_ppm", Sdf.ValueTypeNames.Double, float(e.get("co2_ppm", 420))):
-            updated["environment"] += 1
-        if _set_attr(env, "light_lux", Sdf.ValueTypeNames.Double, float(e.get("light_lux", 8000))):
-            updated["environment"] += 1
-
-    # Actuators
-    act = stage.GetPrimAtPath(ACTUATORS)
-    if act:
-        a = state.get("actuators", {})
-        if _set_attr(act, "fan", Sdf.ValueTypeNames.Double, float(a.get("fan", 0))):
-            updated["actuators"] += 1
-        if _set_attr(act, "vent", Sdf.ValueTypeNames.Double, float(a.get("vent", 0))):
-            updated["actuators"] += 1
-        if _set_attr(act, "water_valve", Sdf.ValueTypeNames.Bool, bool(a.get("water_valve", False))):
-            updated["actuators"] += 1
-
-    # Zones -> bed_1, bed_2, bed_3
-    zones = state.get("zones", [])
-    bed_paths = [BED_1, BED_2, BED_3]
-    for i, bed_path in enumerate(bed_paths):
-        bed = stage.GetPrimAtPath(bed_path)
-        if not bed or i >= len(zones):
-            continue
-        z = zones[i]
-        if _set_attr(bed, "crop", Sdf.ValueTypeNames.String, str(z.get("crop", "lettuce"))):
-            updated["zones"] += 1
-        if _set_attr(bed, "soil_moisture", Sdf.ValueTypeNames.Double, float(z.get("soil_moisture", 0.5))):
-            updated["zones"] += 1
-        if _set_attr(bed, "plant_height_cm", Sdf.ValueTypeNames.Double, float(z.get("plant_height_cm", 12))):
-            updated["zones"] += 1
-        # health: JSON may be number or string
-        health_val = z.get("health", "0.9")
-        if isinstance(health_val, (int, float)):
-            health_val = str(health_val)
-        if _set_attr(bed, "health", Sdf.ValueTypeNames.String, health_val):
-            updated["zones"] += 1
-
-    stage.GetRootLayer().Save()
+    # Attributes were created in _get_attrs, so only value edits happen here:
+    # batch their change notifications into one.
+    with Sdf.ChangeBlock():
+        # Timestamp on Greenhouse
+        if attrs.timestamp is not None and attrs.timestamp.Set(state.get("timestamp", "")):
+            updated["timestamp"] = True
+
+        updated["environment"] = _write(attrs.environment, state.get("environment", {}))
+        updated["actuators"] = _write(attrs.actuators, state.get("actuators", {}))
+
+        # Zones -> bed_1, bed_2, bed_3
+        zones = state.get("zones", [])
+        for bindings, z in zip(attrs.beds, zones):
+            updated["zones"] += _write(bindings, z)
+
+    if save:
+        _get_stage(usd_path).GetRootLayer().Save()
     return updated
 
 
 if __name__ == "__main__":
     import sys
     try:
-        result = sync()
+        result = sync(save=True)
         print("Updated:", result)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -28,6 +28,17 @@ import os
 import subprocess
 import sys
 import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def resolve_path(path: str | Path, root: Path = PROJECT_ROOT) -> Path:
+    """Return absolute path; if path is relative, join with root."""
+    p = Path(path)
+    return p if p.is_absolute() else root / p
+
 
 # Predefined conditions for the greenhouse
 CONDITIONS = {
@@ -68,18 +79,31 @@ CONDITIONS = {
 }
 
 
+# Request body is built on disk (in memory up to this size) instead of as one string
+BODY_SPOOL_MAX = 64 << 20
+# Raw bytes read per base64 chunk (multiple of 3)
+B64_CHUNK = 3 << 16
+
+
 def image_to_video(image_path: str, output_path: str, num_frames: int = 121, fps: int = 24):
-    """Create a short MP4 video by repeating a single image frame."""
+    """
+    Create a short MP4 video by repeating a single image frame.
+
+    The image is looped at the target frame rate (no fps filter) and encoded
+    with libx264's stillimage tune, so the repeated frames cost almost nothing.
+    """
     duration = num_frames / fps
     cmd = [
         "ffmpeg", "-y",
         "-loop", "1",
+        "-framerate", str(fps),
         "-i", image_path,
+        "-frames:v", str(num_frames),
+        "-vf", "scale=1024:-2",
         "-c:v", "libx264",
-        "-t", str(duration),
+        "-tune", "stillimage",
+        "-preset", "ultrafast",
         "-pix_fmt", "yuv420p",
-        "-vf", f"scale=1024:-2,fps={fps}",
-        "-preset", "fast",
         output_path,
     ]
     result = subprocess.run(cmd, capture_output=True, text=True)
@@ -89,27 +113,127 @@ def image_to_video(image_path: str, output_path: str, num_frames: int = 121, fps
     print(f"Created video: {output_path} ({num_frames} frames, {duration:.1f}s)")
 
 
+def write_json_body(out, fields: dict, b64_key: str, file_path: str) -> int:
+    """
+    Write a JSON object to the binary stream out: fields plus b64_key set to the
+    base64 of file_path's contents, encoded chunk by chunk from disk.
+    Returns the length of the base64 string.
+    """
+    head = json.dumps(fields)
+    out.write(f'{head[:-1]}, {json.dumps(b64_key)}: "'.encode())
+    b64_len = 0
+    with open(file_path, "rb") as f:
+        # Chunk size is a multiple of 3 so chunks encode without inner padding
+        while chunk := f.read(B64_CHUNK):
+            encoded = base64.b64encode(chunk)
+            out.write(encoded)
+            b64_len += len(encoded)
+    out.write(b'"}')
+    return b64_len
+
+
+# NVCF async pattern: the server answers 202 + NVCF-REQID after NVCF_POLL_SECONDS,
+# and the result is then polled from the status endpoint
+NVCF_STATUS_URL = "https://api.nvcf.nvidia.com/v2/nvcf/pexec/status/{}"
+NVCF_POLL_SECONDS = 60
+# Overall wait for a transfer result (seconds)
+TRANSFER_TIMEOUT = 600
+POLL_BACKOFF_MAX = 10
+
+# Known Cosmos Transfer endpoints, tried in order until one does not answer 404
+TRANSFER_URLS = (
+    "https://ai.api.nvidia.com/v1/cosmos/nvidia/cosmos-transfer1-7b",
+    "https://integrate.api.nvidia.com/v1/cosmos/nvidia/cosmos-transfer1-7b",
+)
+# The endpoint that last worked is remembered here so later runs try it first
+ENDPOINT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "cosmos-greenhouse", "transfer_endpoint")
+
+# Shared HTTP session (keep-alive, pooled connections); created on first call
+_session = None
+# Endpoint that last answered with something other than 404 in this process
+_working_url = None
+
+
+def _cached_url():
+    """Return the endpoint remembered by a previous run, or None."""
+    try:
+        with open(ENDPOINT_CACHE_PATH) as f:
+            url = f.read().strip()
+    except OSError:
+        return None
+    return url if url in TRANSFER_URLS else None
+
+
+def _remember_url(url: str) -> None:
+    """Persist the working endpoint for later runs (best effort)."""
+    try:
+        os.makedirs(os.path.dirname(ENDPOINT_CACHE_PATH), exist_ok=True)
+        with open(ENDPOINT_CACHE_PATH, "w") as f:
+            f.write(url + "\n")
+    except OSError:
+        pass
+
+
+def _candidate_urls() -> tuple:
+    """Endpoints to try in order: COSMOS_TRANSFER_URL override, else last working one first."""
+    override = os.environ.get("COSMOS_TRANSFER_URL", "").strip()
+    if override and override not in TRANSFER_URLS:
+        return (override,)
+    preferred = _working_url or _cached_url()
+    if preferred is None:
+        return TRANSFER_URLS
+    return (preferred,) + tuple(u for u in TRANSFER_URLS if u != preferred)
+
+
+def _get_session():
+    """Return the shared requests.Session, creating it on first use."""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        # Only retry failed connects: the streamed upload body is not replayed by urllib3
+        retry = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5)
+        session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
+        _session = session
+    return _session
+
+
+def _poll_until_done(session, response, api_key: str, deadline: float):
+    """Follow NVCF 202 (pending) responses via the status endpoint until a final response."""
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Accept": "application/json",
+        "NVCF-POLL-SECONDS": str(NVCF_POLL_SECONDS),
+    }
+    attempt = 0
+    while response.status_code == 202:
+        req_id = response.headers.get("NVCF-REQID")
+        if not req_id or time.monotonic() > deadline:
+            break
+        print(f"  Pending (request {req_id}), polling...")
+        if attempt:
+            time.sleep(min(POLL_BACKOFF_MAX, 1 << attempt))
+        response = session.get(
+            NVCF_STATUS_URL.format(req_id), headers=headers, timeout=NVCF_POLL_SECONDS + 30
+        )
+        attempt += 1
+    return response
+
+
 def call_cosmos_transfer(video_path: str, prompt: str, api_key: str, seed: int = 42):
     """Send video to Cosmos Transfer API and return photorealistic video."""
+    global _working_url
     try:
-        import requests
+        session = _get_session()
     except ImportError:
         print("pip install requests", file=sys.stderr)
         sys.exit(1)
 
-    # Try multiple possible endpoint URLs
-    urls = [
-        "https://ai.api.nvidia.com/v1/cosmos/nvidia/cosmos-transfer1-7b",
-        "https://integrate.api.nvidia.com/v1/cosmos/nvidia/cosmos-transfer1-7b",
-    ]
-    url = os.environ.get("COSMOS_TRANSFER_URL", "").strip() or urls[0]
-
-    with open(video_path, "rb") as f:
-        video_b64 = base64.b64encode(f.read()).decode("utf-8")
-
-    payload = {
+    fields = {
         "prompt": prompt,
-        "video": video_b64,
         "seed": seed,
         "guidance_scale": 7,
         "edge": {"control_weight": 0.8},
@@ -119,20 +243,34 @@ def call_cosmos_transfer(video_path: str, prompt: str, api_key: str, seed: int =
         "Authorization": f"Bearer {api_key}",
         "Accept": "application/json",
         "Content-Type": "application/json",
+        # Release the connection with a 202 after this long instead of holding it for minutes
+        "NVCF-POLL-SECONDS": str(NVCF_POLL_SECONDS),
     }
 
-    print(f"Sending to Cosmos Transfer API...")
-    print(f"Prompt: {prompt[:100]}...")
-    print(f"Video size: {len(video_b64) // 1024}KB (base64)")
-    print("This may take 1-5 minutes...")
-
-    response = None
-    for try_url in ([url] if url not in urls else urls):
-        print(f"Trying: {try_url}")
-        response = requests.post(try_url, headers=headers, json=payload, timeout=600)
-        if response.status_code != 404:
-            break
-        print(f"  Got 404, trying next URL...")
+    with tempfile.SpooledTemporaryFile(max_size=BODY_SPOOL_MAX) as body:
+        video_b64_len = write_json_body(body, fields, "video", video_path)
+        body_len = body.tell()
+        headers["Content-Length"] = str(body_len)
+
+        print(f"Sending to Cosmos Transfer API...")
+        print(f"Prompt: {prompt[:100]}...")
+        print(f"Video size: {video_b64_len // 1024}KB (base64)")
+        print("This may take 1-5 minutes...")
+
+        deadline = time.monotonic() + TRANSFER_TIMEOUT
+        response = None
+        for try_url in _candidate_urls():
+            print(f"Trying: {try_url}")
+            body.seek(0)
+            response = session.post(try_url, headers=headers, data=body, timeout=TRANSFER_TIMEOUT)
+            if response.status_code != 404:
+                if try_url in TRANSFER_URLS and try_url != _working_url:
+                    _remember_url(try_url)
+                _working_url = try_url
+                break
+            print(f"  Got 404, trying next URL...")
+
+    response = _poll_until_done(session, response, api_key, deadline)
 
     if response.status_code != 200:
         print(f"API error {response.status_code}: {response.text[:500]}", file=sys.stderr)
@@ -164,15 +302,13 @@ def main():
         print("Get one at: https://build.nvidia.com/nvidia/cosmos-transfer1-7b", file=sys.stderr)
         sys.exit(1)
 
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    image_path = args.image if os.path.isabs(args.image) else os.path.join(project_root, args.image)
-
-    if not os.path.isfile(image_path):
+    image_path = resolve_path(args.image)
+    if not image_path.is_file():
         print(f"Error: Image not found: {image_path}", file=sys.stderr)
         sys.exit(1)
 
     prompt = args.prompt or CONDITIONS[args.condition]
-    output_path = args.output or os.path.join(project_root, "demo", f"transfer_{args.condition}.mp4")
+    output_path = Path(args.output) if args.output else PROJECT_ROOT / "demo" / f"transfer_{args.condition}.mp4"
 
     # Step 1: Convert image to video
     with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
@@ -180,13 +316,13 @@ def main():
 
     try:
         print(f"\n=== Cosmos Transfer: {args.condition.upper()} ===\n")
-        image_to_video(image_path, tmp_video)
+        image_to_video(str(image_path), tmp_video)
 
         # Step 2: Send to Cosmos Transfer
         video_bytes = call_cosmos_transfer(tmp_video, prompt, api_key, args.seed)
 
         # Step 3: Save output
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, "wb") as f:
             f.write(video_bytes)
         print(f"\nSaved: {output_path}")
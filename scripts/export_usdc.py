@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Write binary (.usdc) copies of the greenhouse root stage and its large plants layer.
+
+update_state.py runs once per telemetry update and prefers usd/root/greenhouse.usdc,
+skipping the ASCII parse of the root and of usd/components/plants.usda on every call.
+
+live_state.usda (the write target), plant_states.usda and greenhouse_looks.usda stay
+ASCII: the .usdc root keeps pointing at them, so telemetry writes are still visible.
+
+Usage (from project root):
+  python scripts/export_usdc.py
+  python scripts/export_usdc.py --live-state
+
+Re-run after editing greenhouse.usda or regenerating plants.usda. The mtime of every
+exported source (greenhouse.usda and plants.usda) is recorded in
+usd/root/greenhouse.usdc.sources.json; update_state.py uses the .usdc only while every
+recorded mtime still matches, and falls back to greenhouse.usda as soon as any source
+changes or the record is missing.
+
+--live-state also converts usd/layers/live_state.usda to binary live_state.usdc and
+re-points the live_state sublayer of both greenhouse.usda and greenhouse.usdc at it, so
+every Save() of the telemetry layer writes crate instead of re-formatting ASCII. All tools
+find the layer by either extension. The .usda is left in place but is no longer composed;
+re-running with --live-state after the switch leaves live_state.usdc untouched.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+try:
+    from pxr import Sdf
+except ImportError:
+    print("Error: pxr (USD) not found. Install usd-core or use Omniverse Python.", file=sys.stderr)
+    sys.exit(1)
+
+
+def _project_root():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.dirname(script_dir)
+
+
+# (layer, asset path as authored in greenhouse.usda) exported next to the source as .usdc
+BINARY_LAYERS = (
+    (os.path.join("usd", "components", "plants.usda"), "../components/plants.usda"),
+)
+ROOT_LAYER = os.path.join("usd", "root", "greenhouse.usda")
+# Source mtimes at export time, checked by update_state.py (see _greenhouse_stage_path)
+SOURCES_RECORD = os.path.join("usd", "root", "greenhouse.usdc.sources.json")
+LIVE_STATE_LAYER = os.path.join("usd", "layers", "live_state.usda")
+LIVE_STATE_ASSET = "../layers/live_state.usda"
+
+
+def _usdc_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".usdc"
+
+
+def export_binary(src_path: str, rewrites: dict[str, str] | None = None) -> str:
+    """Export src_path to a .usdc sibling, re-pointing composition arcs in rewrites {old: new}."""
+    src = Sdf.Layer.FindOrOpen(src_path)
+    if not src:
+        raise RuntimeError(f"Failed to open {src_path}")
+
+    out_path = _usdc_path(src_path)
+    out = Sdf.Layer.CreateNew(out_path)
+    if not out:
+        out = Sdf.Layer.FindOrOpen(out_path)
+    out.TransferContent(src)
+    for old, new in (rewrites or {}).items():
+        out.UpdateCompositionAssetDependency(old, new)
+    if not out.Save():
+        raise RuntimeError(f"Failed to write {out_path}")
+    return out_path
+
+
+def use_binary_live_state(root: str) -> str | None:
+    """
+    Export live_state to .usdc and re-point greenhouse.usda's sublayer at it; returns the .usdc path.
+
+    Returns None without exporting once the switch is done (greenhouse.usda no longer sublayers
+    the .usda and live_state.usdc exists): the .usdc is then the live layer and the .usda is
+    stale, so exporting again would overwrite the telemetry written since.
+    """
+    greenhouse = Sdf.Layer.FindOrOpen(os.path.join(root, ROOT_LAYER))
+    if not greenhouse:
+        raise RuntimeError(f"Failed to open {ROOT_LAYER}")
+    src_path = os.path.join(root, LIVE_STATE_LAYER)
+    if LIVE_STATE_ASSET not in greenhouse.subLayerPaths and os.path.exists(_usdc_path(src_path)):
+        return None
+    out_path = export_binary(src_path)
+    if LIVE_STATE_ASSET in greenhouse.subLayerPaths:
+        greenhouse.UpdateCompositionAssetDependency(LIVE_STATE_ASSET, _usdc_path(LIVE_STATE_ASSET))
+        if not greenhouse.Save():
+            raise RuntimeError(f"Failed to write {ROOT_LAYER}")
+    return out_path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write binary .usdc copies of the greenhouse root and plants layers")
+    ap.add_argument("--live-state", action="store_true",
+                    help="also switch the live_state telemetry layer to binary live_state.usdc")
+    args = ap.parse_args()
+
+    root = _project_root()
+
+    if args.live_state:
+        # Before the root export below, so greenhouse.usdc inherits the new sublayer path
+        out_path = use_binary_live_state(root)
+        if out_path is None:
+            print(f"Skipped {_usdc_path(LIVE_STATE_LAYER)}: already the live layer, not overwriting it")
+        else:
+            print(f"Wrote {out_path} (greenhouse.usda now sublayers it)")
+
+    rewrites = {}
+    for rel_path, asset_path in BINARY_LAYERS:
+        out_path = export_binary(os.path.join(root, rel_path))
+        rewrites[asset_path] = _usdc_path(asset_path)
+        print(f"Wrote {out_path}")
+
+    out_path = export_binary(os.path.join(root, ROOT_LAYER), rewrites)
+    print(f"Wrote {out_path}")
+
+    # live_state is not recorded: the binary root only points at it, it holds no copy
+    sources = [rel_path for rel_path, _ in BINARY_LAYERS] + [ROOT_LAYER]
+    record = {rel_path: os.stat(os.path.join(root, rel_path)).st_mtime_ns for rel_path in sources}
+    with open(os.path.join(root, SOURCES_RECORD), "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    print(f"Wrote {os.path.join(root, SOURCES_RECORD)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,41 @@ def _stage_path():
 # Zone C: Z > 2.67
 ZONE_C_MIN_Z = 2.67
 
+ZONE_PATH = "/World/Environment/Greenhouse/Plants/Bed_03/Zones/Zone_C"
+MAT_UNHEALTHY = "/World/Looks/UnhealthyPlantMat"
+
+# B03-C zone attrs for the dry shot (name, type, value), in authored order
+ZONE_ATTRS = (
+    ("zone:healthScore", Sdf.ValueTypeNames.Float, 0.5),
+    ("zone:id", Sdf.ValueTypeNames.String, "B03-C"),
+    ("zone:lightPct", Sdf.ValueTypeNames.Float, 70.0),
+    ("zone:soilMoisturePct", Sdf.ValueTypeNames.Float, 22.0),
+    ("zone:status", Sdf.ValueTypeNames.String, "dry"),
+)
+
+
+def build_dry_layer(plant_paths: list[str]) -> "Sdf.Layer":
+    """Build the override layer in memory: Zone_C marked dry, each plant bound to UnhealthyPlantMat."""
+    layer = Sdf.Layer.CreateAnonymous(".usda")
+    layer.documentation = "Video demo: B03-C dry zone. Override only. Strongest when used as top sublayer."
+    layer.pseudoRoot.SetInfo("metersPerUnit", 1.0)
+    layer.pseudoRoot.SetInfo("upAxis", "Y")
+
+    with Sdf.ChangeBlock():
+        # CreatePrimInLayer authors "over" specs for the prim and all its ancestors
+        zone_spec = Sdf.CreatePrimInLayer(layer, ZONE_PATH)
+        for name, type_name, value in ZONE_ATTRS:
+            Sdf.AttributeSpec(zone_spec, name, type_name).default = value
+
+        material = Sdf.Path(MAT_UNHEALTHY)
+        for plant_path in sorted(plant_paths):
+            plant_spec = Sdf.CreatePrimInLayer(layer, plant_path)
+            rel_spec = Sdf.RelationshipSpec(plant_spec, "material:binding", custom=False)
+            rel_spec.targetPathList.explicitItems = [material]
+            rel_spec.SetInfo("bindMaterialAs", "strongerThanDescendants")
+
+    return layer
+
 
 def get_plant_paths_in_zone_c(stage, bed_num: int) -> list[str]:
     """Return plant prim paths in Bed bed_num, Zone C (Z > 2.67)."""
@@ -74,63 +109,14 @@ def main():
     if not plant_paths:
         print("Warning: No plants found in B03-C. Check stage.", file=sys.stderr)
 
-    # Build USDA content: over World/.../Plants/Bed_03/Zones/Zone_C (dry) + each plant → UnhealthyPlantMat
-    lines = [
-        '#usda 1.0',
-        '(',
-        '    doc = "Video demo: B03-C dry zone. Override only. Strongest when used as top sublayer."',
-        '    metersPerUnit = 1',
-        '    upAxis = "Y"',
-        ')',
-        '',
-        'over "World"',
-        '{',
-        '    over "Environment"',
-        '    {',
-        '        over "Greenhouse"',
-        '        {',
-        '            over "Plants"',
-        '            {',
-        '                over "Bed_03"',
-        '                {',
-        '                    over "Zones"',
-        '                    {',
-        '                        over "Zone_C"',
-        '                        {',
-        '                            float zone:healthScore = 0.5',
-        '                            string zone:id = "B03-C"',
-        '                            float zone:lightPct = 70',
-        '                            float zone:soilMoisturePct = 22',
-        '                            string zone:status = "dry"',
-        '                        }',
-        '                    }',
-        '',
-    ]
-
-    for path in sorted(plant_paths):
-        # path is like /World/Environment/Greenhouse/Plants/Bed_03/Plant_03_C_012
-        name = path.split("/")[-1]
-        lines.append(f'                    over "{name}"')
-        lines.append('                    {')
-        lines.append('                        rel material:binding = </World/Looks/UnhealthyPlantMat> (')
-        lines.append('                            bindMaterialAs = "strongerThanDescendants"')
-        lines.append('                        )')
-        lines.append('                    }')
-        lines.append('')
-
-    lines.extend([
-        '                }',
-        '            }',
-        '        }',
-        '    }',
-        '}',
-        '',
-    ])
+    # Over World/.../Plants/Bed_03/Zones/Zone_C (dry) + each plant → UnhealthyPlantMat
+    layer = build_dry_layer(plant_paths)
 
     out_path = os.path.join(root, "usd", "layers", "demo_dry_zone.usda")
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    with open(out_path, "w") as f:
-        f.write("\n".join(lines))
+    if not layer.Export(out_path):
+        print(f"Error: Failed to write {out_path}", file=sys.stderr)
+        sys.exit(1)
 
     print(f"Wrote {len(plant_paths)} plant overrides to {out_path}")
     print("For the video: open usd/root/greenhouse_dry_demo.usda to see B03-C plants as brown.")
@@ -1,24 +1,146 @@
-from flask import Flask, request, jsonify
-from transformers import AutoProcessor, AutoModelForImageTextToText
-import torch, base64, io
+from flask import Flask, Response, request, jsonify, stream_with_context
+from transformers import AutoProcessor, AutoModelForImageTextToText, TextIteratorStreamer
+import torch, io, json, os, queue, threading
+from concurrent.futures import Future
+from importlib.util import find_spec
 from PIL import Image
 
-print("Loading model...")
+try:
+    from pybase64 import b64decode  # SIMD base64 decode
+except ImportError:
+    from base64 import b64decode
+
+try:
+    from torchvision.io import ImageReadMode, decode_image
+except ImportError:
+    decode_image = None
+
+torch.backends.cuda.matmul.allow_tf32 = True
+torch.set_float32_matmul_precision("high")
+
+# FlashAttention-2 when the flash_attn package is installed, PyTorch SDPA otherwise
+attn_impl = "flash_attention_2" if find_spec("flash_attn") else "sdpa"
+
+# COSMOS_QUANT=int8 (default when bitsandbytes + CUDA are present) halves weight bandwidth;
+# COSMOS_QUANT=none keeps full bf16 weights. The vision tower always stays bf16.
+quant = os.environ.get("COSMOS_QUANT", "").strip().lower()
+if not quant:
+    quant = "int8" if torch.cuda.is_available() and find_spec("bitsandbytes") else "none"
+load_kwargs = {}
+if quant == "int8":
+    from transformers import BitsAndBytesConfig
+    load_kwargs["quantization_config"] = BitsAndBytesConfig(
+        load_in_8bit=True, llm_int8_skip_modules=["vision_tower", "vision_model", "visual", "lm_head"]
+    )
+
+print(f"Loading model (attn={attn_impl}, quant={quant})...")
 model_name = "nvidia/Cosmos-Reason2-2B"
-processor = AutoProcessor.from_pretrained(model_name)
+# The fast (torch) image processor takes decoded uint8 tensors without a PIL/NumPy round-trip
+processor = AutoProcessor.from_pretrained(model_name, use_fast=decode_image is not None)
 model = AutoModelForImageTextToText.from_pretrained(
-    model_name, torch_dtype=torch.bfloat16, device_map="auto"
+    model_name, torch_dtype=torch.bfloat16, device_map="auto", attn_implementation=attn_impl, **load_kwargs
 )
+# Static KV cache + compiled forward lets decode run as a captured CUDA graph
+# (bitsandbytes int8 matmuls do not capture, so only for unquantized weights)
+if torch.cuda.is_available() and quant == "none":
+    model.generation_config.cache_implementation = "static"
+    model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
 print("Model loaded!")
+# Left padding so every prompt in a batch ends at the same position before generation
+processor.tokenizer.padding_side = "left"
+
+MAX_BATCH = int(os.environ.get("COSMOS_MAX_BATCH", "8"))
+pending = queue.Queue()
+
+
+def generate_batch(batch, streamer=None):
+    """Run one padded generate over [(prompt, images, max_tokens, future, streamer), ...]."""
+    prompts = [b[0] for b in batch]
+    images = [img for b in batch for img in b[1]]
+    inputs = processor(text=prompts, images=images if images else None, return_tensors="pt", padding=True)
+    if model.device.type == "cuda":
+        # Pinned host buffers let the H2D copies run asynchronously
+        inputs = {k: v.pin_memory().to(model.device, non_blocking=True) if torch.is_tensor(v) else v
+                  for k, v in inputs.items()}
+    else:
+        inputs = {k: v.to(model.device) if hasattr(v, "to") else v for k, v in inputs.items()}
+    with torch.no_grad():
+        output_ids = model.generate(**inputs, max_new_tokens=max(b[2] for b in batch), streamer=streamer)
+    input_len = inputs["input_ids"].shape[1]
+    return [processor.decode(ids[input_len:input_len + b[2]], skip_special_tokens=True)
+            for ids, b in zip(output_ids, batch)]
+
+
+def batch_worker():
+    """Drain up to MAX_BATCH queued requests and answer them with a single generate call.
+
+    Streaming requests need a batch of one (TextIteratorStreamer is single-sequence),
+    so each of those runs on its own.
+    """
+    while True:
+        batch = [pending.get()]
+        while len(batch) < MAX_BATCH:
+            try:
+                batch.append(pending.get_nowait())
+            except queue.Empty:
+                break
+        groups = [[b] for b in batch if b[4] is not None]
+        plain = [b for b in batch if b[4] is None]
+        if plain:
+            groups.append(plain)
+        for group in groups:
+            streamer = group[0][4]
+            try:
+                for b, result in zip(group, generate_batch(group, streamer)):
+                    b[3].set_result(result)
+            except Exception as e:
+                if streamer is not None:
+                    streamer.end()
+                for b in group:
+                    b[3].set_exception(e)
+
+
+threading.Thread(target=batch_worker, daemon=True).start()
+
+# Rendered chat template split around the user text, per image count; the scaffold never
+# changes between requests, so the Jinja template is rendered once per image count
+_PROMPT_SLOT = "\x00user_text\x00"
+_prompt_templates = {}
+
+
+def build_prompt(n_images: int, text: str) -> str:
+    """Return the chat-templated prompt for one user turn with n_images images and text."""
+    parts = _prompt_templates.get(n_images)
+    if parts is None:
+        content = [{"type": "image"} for _ in range(n_images)] + [{"type": "text", "text": _PROMPT_SLOT}]
+        rendered = processor.apply_chat_template([{"role": "user", "content": content}],
+                                                 tokenize=False, add_generation_prompt=True)
+        parts = _prompt_templates[n_images] = tuple(rendered.split(_PROMPT_SLOT, 1))
+    return parts[0] + text + parts[1]
+
+
+def decode_data_image(raw: bytes):
+    """Decode image bytes on the request thread: CHW uint8 tensor via torchvision, else PIL."""
+    if decode_image is not None:
+        return decode_image(torch.frombuffer(bytearray(raw), dtype=torch.uint8), mode=ImageReadMode.RGB)
+    img = Image.open(io.BytesIO(raw))
+    img.load()  # decode now, not lazily inside the batch worker
+    return img
+
 
 app = Flask(__name__)
 
 @app.route("/v1/chat/completions", methods=["POST"])
 def chat():
-    data = request.json
+    images = []
+    if request.files:
+        # multipart/form-data: chat body in "payload", raw image bytes in "image" parts
+        data = json.loads(request.form["payload"])
+        images.extend(decode_data_image(f.read()) for f in request.files.getlist("image"))
+    else:
+        data = request.json
     messages = data.get("messages", [])
     max_tokens = data.get("max_tokens", 1024)
-    images = []
     text_parts = []
     for msg in messages:
         content = msg.get("content", "")
@@ -32,23 +154,30 @@ def chat():
                     url = part["image_url"]["url"]
                     if url.startswith("data:"):
                         b64 = url.split(",", 1)[1]
-                        img = Image.open(io.BytesIO(base64.b64decode(b64)))
-                        images.append(img)
-    chat_messages = [{"role": "user", "content": []}]
-    for img in images:
-        chat_messages[0]["content"].append({"type": "image", "image": img})
-    chat_messages[0]["content"].append({"type": "text", "text": "\n".join(text_parts)})
-    prompt = processor.apply_chat_template(chat_messages, tokenize=False, add_generation_prompt=True)
-    inputs = processor(text=[prompt], images=images if images else None, return_tensors="pt", padding=True)
-    inputs = {k: v.to(model.device) if hasattr(v, "to") else v for k, v in inputs.items()}
-    with torch.no_grad():
-        output_ids = model.generate(**inputs, max_new_tokens=max_tokens)
-    input_len = inputs["input_ids"].shape[1]
-    result = processor.decode(output_ids[0][input_len:], skip_special_tokens=True)
+                        images.append(decode_data_image(b64decode(b64)))
+    prompt = build_prompt(len(images), "\n".join(text_parts))
+    future = Future()
+    if data.get("stream"):
+        # OpenAI-style SSE: one chat.completion.chunk per decoded text piece
+        streamer = TextIteratorStreamer(processor.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        pending.put((prompt, images, max_tokens, future, streamer))
+
+        def events():
+            for text in streamer:
+                if text:
+                    chunk = {"choices": [{"delta": {"content": text}, "index": 0}], "model": model_name}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+            future.result()  # surface generation errors
+            yield "data: [DONE]\n\n"
+
+        return Response(stream_with_context(events()), mimetype="text/event-stream")
+
+    pending.put((prompt, images, max_tokens, future, None))
+    result = future.result()
     return jsonify({
         "choices": [{"message": {"role": "assistant", "content": result}, "index": 0}],
         "model": model_name,
     })
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000)
+    app.run(host="0.0.0.0", port=8000, threaded=True)
@@ -19,11 +19,12 @@ Without USD (e.g. cloud instance): use --context-file or default context.
 """
 
 import argparse
-import base64
+import bisect
 import json
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 try:
@@ -32,8 +33,20 @@ try:
 except ImportError:
     _HAS_PXR = False
 
+if _HAS_PXR:
+    # Value type handles resolved once instead of per attribute write
+    _VT_FLOAT = Sdf.ValueTypeNames.Float
+    _VT_INT = Sdf.ValueTypeNames.Int
+    _VT_STRING = Sdf.ValueTypeNames.String
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from cosmos_client import COSMOS_API_URL, COSMOS_API_KEY, call_cosmos, is_configured
 from schema import ContextPayload
+from usd_helpers import author_attr, find_live_state_layer
 
 # Default context when no USD and no --context-file (e.g. run on cloud without pxr)
 DEFAULT_CONTEXT: ContextPayload = {
@@ -47,6 +60,13 @@ PATH_FAN = "/World/Environment/Greenhouse/Devices/Fan_01"
 PATH_VENT = "/World/Environment/Greenhouse/Devices/Vent_01"
 PATH_VALVE = "/World/Environment/Greenhouse/Devices/Valve_01"
 
+# Recommendation action → (device path, float attr, label)
+DEVICE_ACTIONS = {
+    "set_fan": (PATH_FAN, "device:power", "Fan_01"),
+    "set_vent": (PATH_VENT, "device:position", "Vent_01"),
+    "set_valve": (PATH_VALVE, "device:flow", "Valve_01"),
+}
+
 
 def _parse_zone_id(zone_id: str) -> tuple[int | None, str | None]:
     """Parse zone ID (e.g. B03-C) into (bed_num, zone_letter). Returns (None, None) if invalid."""
@@ -60,6 +80,7 @@ def _apply_zone_status_from_context(stage, live_layer, context: dict) -> list[st
     """
     Set zone:status (and related attrs) in live_state for dry/shaded zones from context.
     So plants in those zones will turn unhealthy when sync_plant_materials runs.
+    Authors specs directly on live_layer, so it is safe inside an Sdf.ChangeBlock.
     Returns list of actions taken.
     """
     actions = []
@@ -72,22 +93,18 @@ def _apply_zone_status_from_context(stage, live_layer, context: dict) -> list[st
         if bed_num is None:
             continue
         zone_path = f"{PATH_PLANTS}/Bed_{bed_num:02d}/Zones/Zone_{zone_letter}"
-        prim = stage.OverridePrim(zone_path)
-        if prim:
-            prim.CreateAttribute("zone:status", Sdf.ValueTypeNames.String).Set("dry")
-            prim.CreateAttribute("zone:soilMoisturePct", Sdf.ValueTypeNames.Float).Set(22.0)
-            prim.CreateAttribute("zone:healthScore", Sdf.ValueTypeNames.Float).Set(0.5)
-            actions.append(f"Zone {zone_id}: status=dry (plants → unhealthy)")
+        author_attr(live_layer, zone_path, "zone:status", _VT_STRING, "dry")
+        author_attr(live_layer, zone_path, "zone:soilMoisturePct", _VT_FLOAT, 22.0)
+        author_attr(live_layer, zone_path, "zone:healthScore", _VT_FLOAT, 0.5)
+        actions.append(f"Zone {zone_id}: status=dry (plants → unhealthy)")
 
     for zone_id in shaded_zones:
         bed_num, zone_letter = _parse_zone_id(zone_id)
         if bed_num is None:
             continue
         zone_path = f"{PATH_PLANTS}/Bed_{bed_num:02d}/Zones/Zone_{zone_letter}"
-        prim = stage.OverridePrim(zone_path)
-        if prim:
-            prim.CreateAttribute("zone:status", Sdf.ValueTypeNames.String).Set("shaded")
-            actions.append(f"Zone {zone_id}: status=shaded (plants → unhealthy)")
+        author_attr(live_layer, zone_path, "zone:status", _VT_STRING, "shaded")
+        actions.append(f"Zone {zone_id}: status=shaded (plants → unhealthy)")
 
     return actions
 
@@ -107,6 +124,16 @@ def _logs_dir() -> str:
     return d
 
 
+def _write_json_log(path: str, data: dict) -> None:
+    """Serialize data once (orjson when installed) and write it in a single call."""
+    if orjson is not None:
+        body = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        body = json.dumps(data, indent=2).encode("utf-8")
+    with open(path, "wb", buffering=1 << 20) as f:
+        f.write(body)
+
+
 def get_float(prim, name: str, default: float | None = None) -> float:
     attr = prim.GetAttribute(name)
     if attr:
@@ -115,13 +142,13 @@ def get_float(prim, name: str, default: float | None = None) -> float:
     return default if default is not None else 0.0
 
 
-def get_string(prim, name: str, default: str = "") -> str:
-    """Get string attribute value from prim."""
-    attr = prim.GetAttribute(name)
-    if attr:
-        val = attr.Get()
-        return str(val) if val is not None else default
-    return default
+# zone attr → (context key, default, cast) for read_zone_data
+_ZONE_ATTRS = (
+    ("zone:soilMoisturePct", "soilMoisturePct", 40.0, float),
+    ("zone:lightPct", "lightPct", 70.0, float),
+    ("zone:healthScore", "healthScore", 0.8, float),
+    ("zone:status", "status", "ok", str),
+)
 
 
 def read_zone_data(stage) -> list[dict]:
@@ -135,24 +162,23 @@ def read_zone_data(stage) -> list[dict]:
             prim = stage.GetPrimAtPath(zone_path)
             if prim and prim.IsValid():
                 zone_id = f"B{bed_num:02d}-{zone_letter}"
-                zones.append({
+                zone = {
                     "zoneId": zone_id,
                     "bedNumber": bed_num,
                     "position": zone_letter,  # A=north, B=center, C=south
-                    "soilMoisturePct": get_float(prim, "zone:soilMoisturePct", 40.0),
-                    "lightPct": get_float(prim, "zone:lightPct", 70.0),
-                    "healthScore": get_float(prim, "zone:healthScore", 0.8),
-                    "status": get_string(prim, "zone:status", "ok"),
-                })
+                }
+                # One attribute fetch per zone, then plain dict lookups
+                attrs = {a.GetName(): a for a in prim.GetAttributes()}
+                for attr_name, key, default, cast in _ZONE_ATTRS:
+                    attr = attrs.get(attr_name)
+                    val = attr.Get() if attr else None
+                    zone[key] = cast(val) if val is not None else default
+                zones.append(zone)
     return zones
 
 
-def read_snapshot(stage_path: str) -> ContextPayload:
-    """Load stage and return sensor + device + zone context for spatial reasoning."""
-    stage = Usd.Stage.Open(stage_path)
-    if not stage:
-        raise RuntimeError("Failed to open stage")
-
+def _snapshot_from_stage(stage) -> ContextPayload:
+    """Return sensor + device + zone context for spatial reasoning from an open stage."""
     sensor = stage.GetPrimAtPath(PATH_SENSOR)
     fan = stage.GetPrimAtPath(PATH_FAN)
     vent = stage.GetPrimAtPath(PATH_VENT)
@@ -188,11 +214,11 @@ def read_snapshot(stage_path: str) -> ContextPayload:
     }
 
 
-def load_image_base64(path: str, max_longest_side: int = 0) -> str:
-    """Read image file and return base64-encoded string (JPEG). If max_longest_side > 0, resize to reduce payload."""
+def load_image_bytes(path: str, max_longest_side: int = 0) -> bytes:
+    """Read image file and return its bytes. If max_longest_side > 0, resize (JPEG) to reduce payload."""
     if max_longest_side <= 0:
         with open(path, "rb") as f:
-            return base64.b64encode(f.read()).decode("ascii")
+            return f.read()
     try:
         from PIL import Image
         import io
@@ -206,36 +232,10 @@ def load_image_base64(path: str, max_longest_side: int = 0) -> str:
             img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
         buf = io.BytesIO()
         img.save(buf, format="JPEG", quality=85)
-        return base64.b64encode(buf.getvalue()).decode("ascii")
+        return buf.getvalue()
     except ImportError:
         with open(path, "rb") as f:
-            return base64.b64encode(f.read()).decode("ascii")
-
-
-# ─────────────────────────────────────────────────────────────────────────────
-# Day 7: Actuation - Apply recommendations to live_state.usda
-# ─────────────────────────────────────────────────────────────────────────────
-
-def find_live_state_layer(stage):
-    """Return the layer in the stage's layer stack whose identifier contains 'live_state.usda'."""
-    try:
-        stack = stage.GetLayerStack()
-    except Exception:
-        return None
-    for layer in stack:
-        ident = layer.GetIdentifier() if hasattr(layer, "GetIdentifier") else str(layer)
-        if "live_state.usda" in ident:
-            return layer
-    return None
-
-
-def set_float_attr(prim, name: str, value: float) -> bool:
-    """Create or update a float attribute on a prim."""
-    attr = prim.CreateAttribute(name, Sdf.ValueTypeNames.Float)
-    if attr:
-        attr.Set(value)
-        return True
-    return False
+            return f.read()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -245,51 +245,117 @@ def set_float_attr(prim, name: str, value: float) -> bool:
 PATH_PLANTS = "/World/Environment/Greenhouse/Plants"
 MAT_HEALTHY = "/World/Looks/PlantMat"
 MAT_UNHEALTHY = "/World/Looks/UnhealthyPlantMat"
+# Material last bound to a zone's plants by sync_plant_materials, authored in live_state next to
+# the bindings; a zone whose marker already matches its status is not re-enumerated
+ZONE_BOUND_MATERIAL = "zone:boundMaterial"
 
 # Zone Z boundaries (bed is 16m, split into 3 zones of ~5.33m each)
 ZONE_A_MAX_Z = -2.67
 ZONE_B_MAX_Z = 2.67
+_ZONE_BOUNDS_Z = (ZONE_A_MAX_Z, ZONE_B_MAX_Z)
+
+# Threads for the read-only plant gather in sync_plant_materials (one bed per task)
+SYNC_WORKERS = 8
 
 
-def get_zone_z_range(zone_letter: str) -> tuple[float, float]:
-    """Return (min_z, max_z) for a zone letter."""
-    if zone_letter == "A":
-        return -8.0, ZONE_A_MAX_Z
-    elif zone_letter == "B":
-        return ZONE_A_MAX_Z, ZONE_B_MAX_Z
-    else:  # C
-        return ZONE_B_MAX_Z, 8.0
+def zone_letter_for_z(z_pos: float) -> str | None:
+    """Return the zone letter for a plant Z position, or None if it lies before Zone A."""
+    if z_pos < -8.0:
+        return None
+    return "ABC"[bisect.bisect_right(_ZONE_BOUNDS_Z, z_pos)]
 
 
-def get_plants_in_zone(stage, bed_num: int, zone_letter: str) -> list:
-    """Return list of plant prims in the given zone based on Z position."""
-    bed_path = f"{PATH_PLANTS}/Bed_{bed_num:02d}"
-    bed_prim = stage.GetPrimAtPath(bed_path)
-    if not bed_prim or not bed_prim.IsValid():
-        return []
+def _bed_number(bed_name: str) -> int | None:
+    """Parse NN from a Bed_NN prim name."""
+    try:
+        return int(bed_name[4:])
+    except ValueError:
+        return None
 
-    min_z, max_z = get_zone_z_range(zone_letter)
-    plants = []
 
-    for child in bed_prim.GetChildren():
-        name = child.GetName()
+def walk_plants(stage, beds: set[int] | None = None) -> dict[tuple[int, str], list]:
+    """
+    Traverse the Plants hierarchy once and bin plant prims by zone.
+
+    If beds is given, only those Bed_NN subtrees are visited.
+    Returns {(bed_num, zone_letter): [plant prims]} using the Z bins of zone_letter_for_z.
+    """
+    plants_root = stage.GetPrimAtPath(PATH_PLANTS)
+    if not plants_root or not plants_root.IsValid():
+        return {}
+
+    by_zone: dict[tuple[int, str], list] = {}
+    it = iter(Usd.PrimRange(plants_root))
+    for prim in it:
+        if prim == plants_root:
+            continue
+        name = prim.GetName()
         if not name.startswith("Plant_"):
+            # Only Bed_NN children can be plants; skip Zones and other subtrees
+            if not name.startswith("Bed_") or (beds is not None and _bed_number(name) not in beds):
+                it.PruneChildren()
             continue
+        it.PruneChildren()
 
-        xform_attr = child.GetAttribute("xformOp:transform")
-        if not xform_attr:
+        bed_name = prim.GetParent().GetName()
+        if not bed_name.startswith("Bed_"):
+            continue
+        bed_num = _bed_number(bed_name)
+        if bed_num is None:
             continue
 
+        xform_attr = prim.GetAttribute("xformOp:transform")
+        if not xform_attr:
+            continue
         transform = xform_attr.Get()
         if transform is None:
             continue
 
-        z_pos = transform[3][2]  # Translation Z from 4x4 matrix
+        zone_letter = zone_letter_for_z(transform[3][2])  # Translation Z from 4x4 matrix
+        if zone_letter is not None:
+            by_zone.setdefault((bed_num, zone_letter), []).append(prim)
+
+    return by_zone
+
+
+def _author_binding(layer, prim, material_path, strength) -> None:
+    """
+    Author a direct material:binding on layer with the Sdf API.
+
+    Equivalent to MaterialBindingAPI.Bind(material, strength) but without the
+    schema wrapper, so it is safe inside an Sdf.ChangeBlock.
+    """
+    prim_spec = Sdf.CreatePrimInLayer(layer, prim.GetPath())
+    if not prim.HasAPI(UsdShade.MaterialBindingAPI):
+        schemas = prim_spec.GetInfo("apiSchemas")
+        if "MaterialBindingAPI" not in schemas.prependedItems:
+            schemas.prependedItems = list(schemas.prependedItems) + ["MaterialBindingAPI"]
+            prim_spec.SetInfo("apiSchemas", schemas)
+
+    rel_spec = layer.GetRelationshipAtPath(prim_spec.path.AppendProperty("material:binding"))
+    if not rel_spec:
+        rel_spec = Sdf.RelationshipSpec(prim_spec, "material:binding", custom=False)
+    rel_spec.targetPathList.explicitItems = [material_path]
+    rel_spec.SetInfo("bindMaterialAs", strength)
+
 
-        if min_z <= z_pos < max_z or (zone_letter == "C" and z_pos >= max_z - 0.1):
-            plants.append(child)
+def _gather_bed_rebinds(stage, bed_num: int, zones: list[tuple], targets: dict) -> list[tuple]:
+    """
+    Read-only half of sync_plant_materials for one bed.
 
-    return plants
+    Returns (zone_id, status, plant_count, plants needing a rebind) per zone.
+    """
+    plants_by_zone = walk_plants(stage, beds={bed_num})
+    results = []
+    for _, zone_letter, zone_id, status in zones:
+        plants = plants_by_zone.get((bed_num, zone_letter), [])
+        target = targets[status == "ok"]
+        stale = []
+        if target:
+            stale = [p for p in plants
+                     if UsdShade.MaterialBindingAPI(p).GetDirectBinding().GetMaterialPath() != target]
+        results.append((zone_id, status, len(plants), stale))
+    return results
 
 
 def sync_plant_materials(stage, live_layer) -> list[str]:
@@ -298,51 +364,91 @@ def sync_plant_materials(stage, live_layer) -> list[str]:
 
     Zones with status != "ok" get UnhealthyPlantMat (brownish).
     Zones with status == "ok" get PlantMat (green).
+    Plants already bound to the target material are skipped.
+
+    Each synced zone records its material in zone:boundMaterial, and zones whose record
+    already matches their status are not enumerated again; delete that opinion from
+    live_state to force a full resync (e.g. after regenerating plants).
 
     Returns list of actions for logging.
     """
     actions = []
 
+    mat_healthy = UsdShade.Material.Get(stage, MAT_HEALTHY)
+    mat_unhealthy = UsdShade.Material.Get(stage, MAT_UNHEALTHY)
+    targets = {
+        True: mat_healthy.GetPath() if mat_healthy else None,
+        False: mat_unhealthy.GetPath() if mat_unhealthy else None,
+    }
+
+    # Pass 1: read zone:status and zone:boundMaterial only; keep zones whose plants may be stale
+    zones = []
+    zone_paths = {}  # zone id -> existing zone prim path, where the marker is authored
     for bed_num in range(1, 9):
         for zone_letter in ["A", "B", "C"]:
+            zone_id = f"B{bed_num:02d}-{zone_letter}"
             zone_path = f"{PATH_PLANTS}/Bed_{bed_num:02d}/Zones/Zone_{zone_letter}"
             zone_prim = stage.GetPrimAtPath(zone_path)
 
             status = "ok"
+            bound = None
             if zone_prim and zone_prim.IsValid():
+                zone_paths[zone_id] = zone_path
                 status_attr = zone_prim.GetAttribute("zone:status")
                 if status_attr:
                     val = status_attr.Get()
                     if val:
                         status = str(val)
-
-            # Only update unhealthy zones to minimize changes
-            if status != "ok":
-                healthy = False
-                material_path = MAT_UNHEALTHY
-            else:
-                healthy = True
-                material_path = MAT_HEALTHY
-
-            plants = get_plants_in_zone(stage, bed_num, zone_letter)
-            material = UsdShade.Material.Get(stage, material_path)
-
-            if plants and material:
-                # Stronger-than-descendants so our opinion wins over root's weakerThanDescendants
-                strength = UsdShade.Tokens.strongerThanDescendants
-                for plant_prim in plants:
-                    binding_api = UsdShade.MaterialBindingAPI(plant_prim)
-                    binding_api.Bind(material, strength)
-
-                zone_id = f"B{bed_num:02d}-{zone_letter}"
-                mat_name = "PlantMat" if healthy else "UnhealthyPlantMat"
-                if status != "ok":
-                    actions.append(f"{zone_id}: {len(plants)} plants → {mat_name} (status={status})")
+                bound_attr = zone_prim.GetAttribute(ZONE_BOUND_MATERIAL)
+                bound = bound_attr.Get() if bound_attr else None
+
+            target = targets[status == "ok"]
+            if target is not None and bound == target.pathString:
+                continue
+            zones.append((bed_num, zone_letter, zone_id, status))
+
+    if not zones:
+        return actions
+
+    # Pass 2: gather plants and their current bindings for beds with a stale zone, one bed
+    # per worker (read-only stage access); all authoring stays on this thread
+    by_bed: dict[int, list] = {}
+    for z in zones:
+        by_bed.setdefault(z[0], []).append(z)
+    with ThreadPoolExecutor(max_workers=min(SYNC_WORKERS, len(by_bed))) as pool:
+        gathered = pool.map(lambda item: _gather_bed_rebinds(stage, item[0], item[1], targets), by_bed.items())
+        results = [r for bed_results in gathered for r in bed_results]
+
+    # Stronger-than-descendants so our opinion wins over root's weakerThanDescendants
+    strength = UsdShade.Tokens.strongerThanDescendants
+
+    # Author binding relationships straight onto live_layer; one recompose at block exit
+    with Sdf.ChangeBlock():
+        for zone_id, status, plant_count, stale in results:
+            target = targets[status == "ok"]
+            for plant_prim in stale:
+                _author_binding(live_layer, plant_prim, target, strength)
+            if target and zone_id in zone_paths:
+                author_attr(live_layer, zone_paths[zone_id], ZONE_BOUND_MATERIAL, _VT_STRING, target.pathString)
+
+            if plant_count and target and status != "ok":
+                actions.append(f"{zone_id}: {plant_count} plants → UnhealthyPlantMat (status={status})")
+            elif stale:
+                actions.append(f"{zone_id}: {len(stale)} plants → PlantMat (status=ok)")
 
     return actions
 
 
-def apply_recommendations(stage_path: str, recommendations: list[dict], context: dict | None = None) -> list[str]:
+# ─────────────────────────────────────────────────────────────────────────────
+# Day 7: Actuation - Apply recommendations to live_state.usda
+# ─────────────────────────────────────────────────────────────────────────────
+
+def apply_recommendations(
+    stage_path: str,
+    recommendations: list[dict],
+    context: dict | None = None,
+    stage=None,
+) -> list[str]:
     """
     Apply Cosmos recommendations to live_state.usda.
 
@@ -350,18 +456,26 @@ def apply_recommendations(stage_path: str, recommendations: list[dict], context:
     is set so plants in those zones switch to the unhealthy material (visual feedback).
     Then plant materials are synced to zone status.
 
+    If stage is given (e.g. the one the context was read from), it is used instead of opening stage_path again.
+
     Returns list of actions taken (for logging/display).
     """
     if not _HAS_PXR:
         return ["Skipped: pxr (USD) not available"]
 
-    if not os.path.isfile(stage_path):
-        return [f"Skipped: Stage not found: {stage_path}"]
+    if stage is None:
+        if not os.path.isfile(stage_path):
+            return [f"Skipped: Stage not found: {stage_path}"]
+
+        stage = Usd.Stage.Open(stage_path)
+        if not stage:
+            return ["Skipped: Failed to open stage"]
 
-    stage = Usd.Stage.Open(stage_path)
-    if not stage:
-        return ["Skipped: Failed to open stage"]
+    return _apply_recommendations_to_stage(stage, recommendations, context)
 
+
+def _apply_recommendations_to_stage(stage, recommendations: list[dict], context: dict | None) -> list[str]:
+    """Apply recommendations (and context zone status) to an open stage's live_state layer."""
     live_layer = find_live_state_layer(stage)
     if not live_layer:
         return ["Skipped: live_state.usda not found in layer stack"]
@@ -371,54 +485,47 @@ def apply_recommendations(stage_path: str, recommendations: list[dict], context:
 
     actions_taken = []
 
-    # Set zone status for dry/shaded zones from context so plants turn unhealthy visually
-    if context:
-        zone_actions = _apply_zone_status_from_context(stage, live_layer, context)
-        actions_taken.extend(zone_actions)
-
-    for rec in recommendations:
-        action = rec.get("action", "")
-        value = rec.get("value")
-        confidence = rec.get("confidence", 0.0)
-
-        # Skip low-confidence or no-action recommendations
-        if action == "no_action" or action == "send_alert":
-            actions_taken.append(f"{action}: {rec.get('why', 'no reason')}")
-            continue
-
-        if value is None:
-            continue
-
-        # Apply actuator changes
-        if action == "set_fan":
-            prim = stage.GetPrimAtPath(PATH_FAN)
-            if prim and prim.IsValid():
-                set_float_attr(prim, "device:power", float(value))
-                actions_taken.append(f"Fan_01 device:power = {value}")
-
-        elif action == "set_vent":
-            prim = stage.GetPrimAtPath(PATH_VENT)
-            if prim and prim.IsValid():
-                set_float_attr(prim, "device:position", float(value))
-                actions_taken.append(f"Vent_01 device:position = {value}")
-
-        elif action == "set_valve":
-            prim = stage.GetPrimAtPath(PATH_VALVE)
-            if prim and prim.IsValid():
-                set_float_attr(prim, "device:flow", float(value))
-                actions_taken.append(f"Valve_01 device:flow = {value}")
-
-    # Update timestamp
     sensor = stage.GetPrimAtPath(PATH_SENSOR)
+    prev_tick = None
     if sensor and sensor.IsValid():
-        ts_attr = sensor.CreateAttribute("state:lastUpdated", Sdf.ValueTypeNames.String)
-        if ts_attr:
-            ts_attr.Set(datetime.now(timezone.utc).isoformat() + "Z")
-        tick_attr = sensor.CreateAttribute("state:tick", Sdf.ValueTypeNames.Int)
-        if tick_attr:
-            prev = tick_attr.Get() or 0
-            tick_attr.Set(prev + 1)
-            actions_taken.append(f"state:tick = {prev + 1}")
+        tick_attr = sensor.GetAttribute("state:tick")
+        prev_tick = (tick_attr.Get() if tick_attr else None) or 0
+
+    # Batch all live_state edits into one change notification. Only Sdf API is used
+    # inside the block; the stage recomposes once when it closes.
+    with Sdf.ChangeBlock():
+        # Set zone status for dry/shaded zones from context so plants turn unhealthy visually
+        if context:
+            zone_actions = _apply_zone_status_from_context(stage, live_layer, context)
+            actions_taken.extend(zone_actions)
+
+        for rec in recommendations:
+            action = rec.get("action", "")
+            value = rec.get("value")
+            confidence = rec.get("confidence", 0.0)
+
+            # Skip low-confidence or no-action recommendations
+            if action == "no_action" or action == "send_alert":
+                actions_taken.append(f"{action}: {rec.get('why', 'no reason')}")
+                continue
+
+            if value is None:
+                continue
+
+            # Apply actuator changes
+            if action in DEVICE_ACTIONS:
+                path, attr_name, label = DEVICE_ACTIONS[action]
+                prim = stage.GetPrimAtPath(path)
+                if prim and prim.IsValid():
+                    author_attr(live_layer, path, attr_name, _VT_FLOAT, float(value))
+                    actions_taken.append(f"{label} {attr_name} = {value}")
+
+        # Update timestamp
+        if prev_tick is not None:
+            author_attr(live_layer, PATH_SENSOR, "state:lastUpdated", _VT_STRING,
+                         datetime.now(timezone.utc).isoformat() + "Z")
+            author_attr(live_layer, PATH_SENSOR, "state:tick", _VT_INT, prev_tick + 1)
+            actions_taken.append(f"state:tick = {prev_tick + 1}")
 
     # Sync plant materials based on zone status (visual feedback)
     plant_actions = sync_plant_materials(stage, live_layer)
@@ -450,29 +557,41 @@ def main() -> None:
         print(f"Error: Image not found: {image_path}", file=sys.stderr)
         sys.exit(1)
 
-    # Get context: from USD stage, from --context-file, or default (no USD)
-    if args.context_file:
-        context_path = args.context_file if os.path.isabs(args.context_file) else os.path.join(root, args.context_file)
-        if not os.path.isfile(context_path):
-            print(f"Error: Context file not found: {context_path}", file=sys.stderr)
-            sys.exit(1)
-        with open(context_path) as f:
-            context = json.load(f)
-        print("Using context from --context-file")
-    elif _HAS_PXR and os.path.isfile(stage_path):
-        context = read_snapshot(stage_path)
-    else:
-        if not _HAS_PXR:
-            print("Note: pxr (USD) not found; using default context. Use --context-file to supply sensor/device JSON.", file=sys.stderr)
+    # Encode the image on a worker thread while the stage is opened and read
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        image_future = pool.submit(load_image_bytes, image_path, args.max_image_size)
+
+        # Open the stage once; it serves both the context snapshot and actuation
+        stage = None
+        if _HAS_PXR and os.path.isfile(stage_path) and (args.actuate or not args.context_file):
+            stage = Usd.Stage.Open(stage_path)
+            if not stage:
+                raise RuntimeError("Failed to open stage")
+
+        # Get context: from USD stage, from --context-file, or default (no USD)
+        if args.context_file:
+            context_path = args.context_file if os.path.isabs(args.context_file) else os.path.join(root, args.context_file)
+            if not os.path.isfile(context_path):
+                print(f"Error: Context file not found: {context_path}", file=sys.stderr)
+                sys.exit(1)
+            with open(context_path) as f:
+                context = json.load(f)
+            print("Using context from --context-file")
+        elif stage:
+            context = _snapshot_from_stage(stage)
         else:
-            print(f"Note: Stage not found: {stage_path}; using default context.", file=sys.stderr)
-        context = DEFAULT_CONTEXT
-    image_b64 = load_image_base64(image_path, max_longest_side=args.max_image_size)
+            if not _HAS_PXR:
+                print("Note: pxr (USD) not found; using default context. Use --context-file to supply sensor/device JSON.", file=sys.stderr)
+            else:
+                print(f"Note: Stage not found: {stage_path}; using default context.", file=sys.stderr)
+            context = DEFAULT_CONTEXT
+
+        image_bytes = image_future.result()
 
     if not is_configured():
         print("DRY RUN: COSMOS_API_URL or COSMOS_API_KEY not set; using mock response.")
 
-    payload, raw = call_cosmos(context, image_b64)
+    payload, raw = call_cosmos(context, image_bytes)
 
     log_dir = _logs_dir()
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
@@ -487,8 +606,7 @@ def main() -> None:
     if raw is not None:
         log_data["raw_model_response"] = raw
 
-    with open(log_path, "w") as f:
-        json.dump(log_data, f, indent=2)
+    _write_json_log(log_path, log_data)
 
     print(f"Log written: {log_path}")
     print("\n--- Summary ---")
@@ -508,7 +626,10 @@ def main() -> None:
     # ─────────────────────────────────────────────────────────────────────────
     if args.actuate:
         print("\n--- Actuation (Day 7) ---")
-        actions = apply_recommendations(stage_path, recs, context)
+        if stage:
+            actions = _apply_recommendations_to_stage(stage, recs, context)
+        else:
+            actions = apply_recommendations(stage_path, recs, context)
         if actions:
             for a in actions:
                 print(f"  ✓ {a}")
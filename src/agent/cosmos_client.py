@@ -10,16 +10,44 @@ adjusted easily.
 """
 
 import base64
+import hashlib
 import json
 import os
+import re
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from schema import ContextPayload, CosmosResponsePayload, parse_response
 
 # Environment variables (no secrets in code)
 COSMOS_API_URL = os.environ.get("COSMOS_API_URL", "").strip()
 COSMOS_API_KEY = os.environ.get("COSMOS_API_KEY", "").strip()
 COSMOS_MODEL = os.environ.get("COSMOS_MODEL", "cosmos-reason-2").strip() or "cosmos-reason-2"
+# "inline" (OpenAI vision format, base64 data URL) or "multipart" (raw JPEG part; serve_cosmos.py)
+COSMOS_IMAGE_UPLOAD = os.environ.get("COSMOS_IMAGE_UPLOAD", "inline").strip().lower() or "inline"
+
+# Request headers never change within a process
+_AUTH_HEADERS = {"Authorization": f"Bearer {COSMOS_API_KEY}"} if COSMOS_API_KEY else {}
+_HEADERS = {"Content-Type": "application/json", **_AUTH_HEADERS}
+
+# Model output cleanup, compiled once
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_CODE_BLOCK_RE = re.compile(r"```(?:json)?\s*\n(.*?)```", re.DOTALL)
+# Unterminated fence: drop the opening ``` line and an optional trailing ```
+_FENCE_RE = re.compile(r"```[^\n]*\n?(.*?)(?:```)?\s*$", re.DOTALL)
+
+# Responses for recently seen (context, image) pairs; quiescent ticks skip the model
+RESPONSE_CACHE_SIZE = 128
+_response_cache: OrderedDict[bytes, tuple[CosmosResponsePayload, dict[str, Any]]] = OrderedDict()
+
+# Shared keep-alive session (created on first real call; requests is optional)
+_session = None
 
 
 def is_configured() -> bool:
@@ -36,30 +64,84 @@ def is_configured() -> bool:
     return bool(COSMOS_API_KEY)
 
 
+def _dumps(obj: Any) -> bytes:
+    """Compact JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data: bytes | str) -> Any:
+    """Parse JSON (orjson when installed); raises json.JSONDecodeError either way."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _get_session():
+    """Return the shared requests.Session, creating it on first use."""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)  # local NIM/vLLM endpoints
+        _session = session
+    return _session
+
+
+def _sensor_scalar(value: Any, default: float) -> float:
+    """Sensor reading as a hashable number for the _mock_rules cache key; default if not numeric."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
 def _mock_response(context: ContextPayload) -> CosmosResponsePayload:
     """Generate a zone-aware mock response for spatial reasoning demo."""
     sensors = context.get("sensors", {})
-    devices = context.get("devices", {})
     alerts = context.get("alerts", {})
-    humidity = sensors.get("humidityPct", 50.0)
-    soil = sensors.get("soilMoisturePct", 40.0)
-    dry_zones = alerts.get("dryZones", [])
-    shaded_zones = alerts.get("shadedZones", [])
+    explanation, recs = _mock_rules(
+        _sensor_scalar(sensors.get("humidityPct"), 50.0),
+        _sensor_scalar(sensors.get("soilMoisturePct"), 40.0),
+        tuple(str(zone) for zone in alerts.get("dryZones") or ()),
+        tuple(str(zone) for zone in alerts.get("shadedZones") or ()),
+    )
+    # Fresh dicts per call: the cached rule output is shared
+    return {"explanation": explanation, "recommendations": [dict(r) for r in recs]}
 
+
+# typed: 55 and 55.0 are equal keys but render differently in the text
+@lru_cache(maxsize=256, typed=True)
+def _mock_rules(
+    humidity: float,
+    soil: float,
+    dry_zones: tuple[str, ...],
+    shaded_zones: tuple[str, ...],
+) -> tuple[str, tuple[tuple[tuple[str, Any], ...], ...]]:
+    """Mock rule chain on flat, hashable inputs; repeated sensor states are cache hits."""
     recommendations: list[dict[str, Any]] = []
     explanation_parts = []
+    dry_str = ", ".join(dry_zones)
+    shaded_str = ", ".join(shaded_zones)
 
     # Zone-aware reasoning
     if dry_zones:
         explanation_parts.append(
-            f"SPATIAL ANALYSIS: Detected dry zones at {', '.join(dry_zones)}. "
+            f"SPATIAL ANALYSIS: Detected dry zones at {dry_str}. "
             f"These zones show soil moisture below 30%, indicating water stress. "
             f"The affected areas are visible in the greenhouse image as potentially wilted plants."
         )
         recommendations.append({
             "action": "set_valve",
             "value": 1.0,
-            "why": f"Irrigate dry zones: {', '.join(dry_zones)}. Soil moisture critically low.",
+            "why": f"Irrigate dry zones: {dry_str}. Soil moisture critically low.",
             "confidence": 0.95,
         })
     elif soil < 30:
@@ -80,13 +162,13 @@ def _mock_response(context: ContextPayload) -> CosmosResponsePayload:
 
     if shaded_zones:
         explanation_parts.append(
-            f"Low light detected in zones: {', '.join(shaded_zones)}. "
+            f"Low light detected in zones: {shaded_str}. "
             "Consider adjusting canopy or supplemental lighting."
         )
         recommendations.append({
             "action": "send_alert",
             "value": None,
-            "why": f"Shaded zones detected: {', '.join(shaded_zones)}. Manual inspection recommended.",
+            "why": f"Shaded zones detected: {shaded_str}. Manual inspection recommended.",
             "confidence": 0.8,
         })
 
@@ -116,10 +198,31 @@ def _mock_response(context: ContextPayload) -> CosmosResponsePayload:
     if not explanation_parts:
         explanation_parts.append("All zones appear healthy. No immediate action required.")
 
-    return {
-        "explanation": "[MOCK SPATIAL REASONING] " + " ".join(explanation_parts),
-        "recommendations": recommendations,
-    }
+    return (
+        "[MOCK SPATIAL REASONING] " + " ".join(explanation_parts),
+        tuple(tuple(r.items()) for r in recommendations),
+    )
+
+
+# Static parts of the prompt; only the zone alerts vary per request
+_INSTRUCTIONS_HEAD = (
+    "You are GreenhouseBot, an AI that performs SPATIAL REASONING over a digital twin greenhouse. "
+    "The greenhouse has 8 beds (Bed_01 to Bed_08), each divided into 3 zones (A=north, B=center, C=south). "
+    "You receive an image of the greenhouse AND zone-level telemetry data.\n\n"
+    "YOUR TASK: Analyze the image and telemetry to identify problems at the ZONE level, "
+    "explain the spatial location of issues (e.g., 'Zone B03-C in the middle-left of the greenhouse appears dry'), "
+    "and recommend targeted actions.\n"
+)
+_INSTRUCTIONS_TAIL = (
+    "\n"
+    "Return JSON only, no other text, with this exact shape:\n"
+    '{"explanation": "string describing spatial observations and reasoning", '
+    '"recommendations": [{"action": "set_fan"|"set_vent"|"set_valve"|"send_alert"|"no_action", '
+    '"value": number|null, "why": "string with zone references", "confidence": number}]}\n\n'
+    "Actions: set_fan (0-1), set_vent (0-100 degrees), set_valve (0-1 flow). "
+    "Mention specific zone IDs (like B03-C) in your explanation and recommendations."
+)
+_ZONE_ALERT_FOOTER = "Reference these zones in your explanation to demonstrate spatial reasoning.\n"
 
 
 def build_request_payload(
@@ -132,7 +235,8 @@ def build_request_payload(
     Isolated so you can adjust format for different API shapes (e.g. OpenAI-compatible
     chat/completions with vision, or custom vision field).
     """
-    context_str = json.dumps(context, indent=2)
+    # Compact: indentation only adds prompt tokens
+    context_str = _dumps(context).decode("utf-8")
 
     # Extract zone alerts for the prompt
     alerts = context.get("alerts", {})
@@ -141,28 +245,16 @@ def build_request_payload(
 
     zone_alert_text = ""
     if dry_zones or shaded_zones:
+        dry_str = ", ".join(dry_zones)
+        shaded_str = ", ".join(shaded_zones)
         zone_alert_text = "\n\nSPATIAL ALERTS:\n"
         if dry_zones:
-            zone_alert_text += f"- DRY ZONES (need irrigation): {', '.join(dry_zones)}\n"
+            zone_alert_text += f"- DRY ZONES (need irrigation): {dry_str}\n"
         if shaded_zones:
-            zone_alert_text += f"- SHADED ZONES (low light): {', '.join(shaded_zones)}\n"
-        zone_alert_text += "Reference these zones in your explanation to demonstrate spatial reasoning.\n"
-
-    instructions = (
-        "You are GreenhouseBot, an AI that performs SPATIAL REASONING over a digital twin greenhouse. "
-        "The greenhouse has 8 beds (Bed_01 to Bed_08), each divided into 3 zones (A=north, B=center, C=south). "
-        "You receive an image of the greenhouse AND zone-level telemetry data.\n\n"
-        "YOUR TASK: Analyze the image and telemetry to identify problems at the ZONE level, "
-        "explain the spatial location of issues (e.g., 'Zone B03-C in the middle-left of the greenhouse appears dry'), "
-        "and recommend targeted actions.\n"
-        f"{zone_alert_text}\n"
-        "Return JSON only, no other text, with this exact shape:\n"
-        '{"explanation": "string describing spatial observations and reasoning", '
-        '"recommendations": [{"action": "set_fan"|"set_vent"|"set_valve"|"send_alert"|"no_action", '
-        '"value": number|null, "why": "string with zone references", "confidence": number}]}\n\n'
-        "Actions: set_fan (0-1), set_vent (0-100 degrees), set_valve (0-1 flow). "
-        "Mention specific zone IDs (like B03-C) in your explanation and recommendations."
-    )
+            zone_alert_text += f"- SHADED ZONES (low light): {shaded_str}\n"
+        zone_alert_text += _ZONE_ALERT_FOOTER
+
+    instructions = _INSTRUCTIONS_HEAD + zone_alert_text + _INSTRUCTIONS_TAIL
     # Common OpenAI-compatible vision format; adjust if your endpoint differs
     messages = [
         {
@@ -183,28 +275,87 @@ def build_request_payload(
     }
 
 
+# Placeholder for the data URL payload; base64 needs no JSON escaping, so it is spliced in as bytes
+_IMAGE_SLOT = "@@IMAGE_BASE64@@"
+
+
+def _inline_body(context: ContextPayload, image: bytes | str) -> bytes:
+    """
+    Serialized JSON request body with the image inline (OpenAI vision format).
+
+    The body is serialized around a placeholder and the base64 bytes are joined in once,
+    so the multi-MB image is never held as a str inside the dict and re-encoded.
+    """
+    # rsplit: the image URL is the last string in the body; context values before it may contain the token
+    head, tail = _dumps(build_request_payload(context, _IMAGE_SLOT)).rsplit(_IMAGE_SLOT.encode("ascii"), 1)
+    image_b64 = base64.b64encode(image) if isinstance(image, bytes) else image.encode("ascii")
+    return b"".join((head, image_b64, tail))
+
+
+def build_multipart_request(
+    context: ContextPayload,
+    image_bytes: bytes,
+    model: str = COSMOS_MODEL,
+) -> dict[str, tuple]:
+    """
+    Build multipart/form-data parts: the chat body (text only) as "payload" and the raw
+    JPEG as "image", so the image is sent without base64 inflation.
+    """
+    body = build_request_payload(context, "", model)
+    body["messages"][0]["content"] = [p for p in body["messages"][0]["content"] if p["type"] == "text"]
+    return {
+        "payload": (None, _dumps(body), "application/json"),
+        "image": ("frame.jpg", image_bytes, "image/jpeg"),
+    }
+
+
 def call_cosmos(
     context: ContextPayload,
-    image_base64: str,
+    image: bytes | str,
 ) -> tuple[CosmosResponsePayload, dict[str, Any] | None]:
     """
     Call Cosmos Reason 2 (or mock). Returns (parsed response, raw response or None).
+    image is raw JPEG bytes, or an already base64-encoded string.
+    Identical (context, image) pairs are answered from an in-process LRU cache.
     """
     if not is_configured():
         payload = _mock_response(context)
         return payload, None
 
+    image_key = image if isinstance(image, bytes) else image.encode("ascii")
+    key = hashlib.blake2b(_dumps(context) + image_key, digest_size=16).digest()
+    cached = _response_cache.get(key)
+    if cached is not None:
+        _response_cache.move_to_end(key)
+        return cached
+
+    result = _call_endpoint(context, image)
+    # Only cache real model answers, never transport/HTTP failures (raw is None)
+    if result[1] is not None:
+        _response_cache[key] = result
+        if len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+    return result
+
+
+def _call_endpoint(
+    context: ContextPayload,
+    image: bytes | str,
+) -> tuple[CosmosResponsePayload, dict[str, Any] | None]:
+    """POST one request to COSMOS_API_URL and parse the reply."""
     try:
         import requests
     except ImportError:
         return _mock_response(context), None
 
-    body = build_request_payload(context, image_base64)
-    headers = {"Content-Type": "application/json"}
-    if COSMOS_API_KEY:
-        headers["Authorization"] = f"Bearer {COSMOS_API_KEY}"
+    if COSMOS_IMAGE_UPLOAD == "multipart":
+        image_bytes = image if isinstance(image, bytes) else base64.b64decode(image)
+        # requests sets the multipart Content-Type (with boundary) itself
+        post_kwargs = {"files": build_multipart_request(context, image_bytes), "headers": _AUTH_HEADERS}
+    else:
+        post_kwargs = {"data": _inline_body(context, image), "headers": _HEADERS}
     try:
-        r = requests.post(COSMOS_API_URL, json=body, headers=headers, timeout=60)
+        r = _get_session().post(COSMOS_API_URL, timeout=60, **post_kwargs)
         r.raise_for_status()
         if not r.text or not r.text.strip():
             return (
@@ -215,7 +366,7 @@ def call_cosmos(
                 None,
             )
         try:
-            raw = r.json()
+            raw = _loads(r.content)
         except json.JSONDecodeError as je:
             preview = (r.text[:500] + "…") if len(r.text) > 500 else r.text
             return (
@@ -269,21 +420,18 @@ def call_cosmos(
             s = content.strip()
 
             # Strip <think>...</think> reasoning blocks (Cosmos Reason 2)
-            import re
-            s = re.sub(r"<think>.*?</think>", "", s, flags=re.DOTALL).strip()
+            if "<think>" in s:
+                s = _THINK_RE.sub("", s).strip()
 
             # Extract JSON from markdown code block (```json ... ```)
-            code_block_match = re.search(r"```(?:json)?\s*\n(.*?)```", s, flags=re.DOTALL)
+            code_block_match = _CODE_BLOCK_RE.search(s)
             if code_block_match:
                 s = code_block_match.group(1).strip()
             elif s.startswith("```"):
                 # Fallback: strip opening/closing fences
-                lines = s.split("\n")
-                s = "\n".join(lines[1:])
-                if s.strip().endswith("```"):
-                    s = s.strip()[:-3].strip()
+                s = _FENCE_RE.match(s).group(1).strip()
 
-            parsed = json.loads(s)
+            parsed = _loads(s)
         else:
             parsed = content if isinstance(content, dict) else {}
         return parse_response(parsed), raw
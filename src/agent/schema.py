@@ -39,23 +39,48 @@ class CosmosResponsePayload(TypedDict, total=False):
     recommendations: list[Recommendation]
 
 
+_ACTIONS = frozenset(("set_fan", "set_vent", "set_valve", "send_alert", "no_action"))
+
+
+_MISSING = object()
+
+
+def _parse_recommendation(r: dict[str, Any]) -> Recommendation:
+    """
+    Validate one recommendation dict: one lookup per field, invalid fields dropped.
+
+    >>> _parse_recommendation({"action": ["set_fan"], "value": 1})
+    {'value': 1}
+    """
+    action = r.get("action")
+    value = r.get("value", _MISSING)
+    why = r.get("why")
+    confidence = r.get("confidence")
+    # Model output may hold any JSON here: check str before hashing for the set lookup
+    valid_action = isinstance(action, str) and action in _ACTIONS
+    # Fast path: the usual well-formed model output keeps every field
+    if valid_action and value is not _MISSING and type(why) is str and type(confidence) is float:
+        return {"action": action, "value": value, "why": why, "confidence": confidence}
+
+    rec: Recommendation = {}
+    if valid_action:
+        rec["action"] = action
+    if value is not _MISSING:
+        rec["value"] = value
+    if isinstance(why, str):
+        rec["why"] = why
+    if isinstance(confidence, (int, float)):
+        rec["confidence"] = float(confidence)
+    return rec
+
+
 def parse_response(raw: dict[str, Any]) -> CosmosResponsePayload:
     """Extract explanation and recommendations from raw API response."""
     out: CosmosResponsePayload = {}
-    if "explanation" in raw and isinstance(raw["explanation"], str):
-        out["explanation"] = raw["explanation"]
-    if "recommendations" in raw and isinstance(raw["recommendations"], list):
-        out["recommendations"] = []
-        for r in raw["recommendations"]:
-            if isinstance(r, dict):
-                rec: Recommendation = {}
-                if r.get("action") in ("set_fan", "set_vent", "set_valve", "send_alert", "no_action"):
-                    rec["action"] = r["action"]
-                if "value" in r:
-                    rec["value"] = r["value"] if r["value"] is not None else None
-                if isinstance(r.get("why"), str):
-                    rec["why"] = r["why"]
-                if isinstance(r.get("confidence"), (int, float)):
-                    rec["confidence"] = float(r["confidence"])
-                out["recommendations"].append(rec)
+    explanation = raw.get("explanation")
+    if isinstance(explanation, str):
+        out["explanation"] = explanation
+    recs = raw.get("recommendations")
+    if isinstance(recs, list):
+        out["recommendations"] = [_parse_recommendation(r) for r in recs if isinstance(r, dict)]
     return out
@@ -16,11 +16,13 @@ import os
 import sys
 
 try:
-    from pxr import Sdf, Usd
+    from pxr import Sdf, Tf, Usd
 except ImportError:
     print("Error: pxr (Usd, Sdf) not found. Use a Python environment with USD.", file=sys.stderr)
     sys.exit(1)
 
+from usd_helpers import author_attr, find_live_state_layer
+
 
 def _project_root():
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -31,23 +33,20 @@ def _greenhouse_stage_path():
     return os.path.join(_project_root(), "usd", "root", "greenhouse.usda")
 
 
+PATH_DEVICES = "/World/Environment/Greenhouse/Devices"
 PATH_SENSOR = "/World/Environment/Greenhouse/Devices/Sensor_01"
 PATH_FAN = "/World/Environment/Greenhouse/Devices/Fan_01"
 PATH_VENT = "/World/Environment/Greenhouse/Devices/Vent_01"
 PATH_VALVE = "/World/Environment/Greenhouse/Devices/Valve_01"
 
-
-def find_live_state_layer(stage):
-    """Return the layer in the stage's layer stack whose identifier contains 'live_state.usda'."""
-    try:
-        stack = stage.GetLayerStack()
-    except Exception:
-        return None
-    for layer in stack:
-        ident = layer.GetIdentifier() if hasattr(layer, "GetIdentifier") else str(layer)
-        if "live_state.usda" in ident:
-            return layer
-    return None
+# Parsed once: Sdf.Path construction and ValueTypeNames lookups are not free per write
+_SENSOR_PATH = Sdf.Path(PATH_SENSOR)
+_FAN_PATH = Sdf.Path(PATH_FAN)
+_VENT_PATH = Sdf.Path(PATH_VENT)
+_VALVE_PATH = Sdf.Path(PATH_VALVE)
+_VT_FLOAT = Sdf.ValueTypeNames.Float
+_VT_INT = Sdf.ValueTypeNames.Int
+_VT_STRING = Sdf.ValueTypeNames.String
 
 
 def get_prim(stage, path):
@@ -57,14 +56,6 @@ def get_prim(stage, path):
     return None
 
 
-def get_float(prim, name, default=None):
-    attr = prim.GetAttribute(name)
-    if attr:
-        val = attr.Get()
-        return val if val is not None else default
-    return default
-
-
 def get_string(prim, name, default=None):
     attr = prim.GetAttribute(name)
     if attr:
@@ -73,31 +64,10 @@ def get_string(prim, name, default=None):
     return default
 
 
-def set_float_attr(prim, name, value):
-    attr = prim.CreateAttribute(name, Sdf.ValueTypeNames.Float)
-    if attr:
-        attr.Set(value)
-        return True
-    return False
-
-
-def set_int_attr(prim, name, value):
-    attr = prim.CreateAttribute(name, Sdf.ValueTypeNames.Int)
-    if attr:
-        attr.Set(value)
-        return True
-    return False
-
+PATH_PLANTS = "/World/Environment/Greenhouse/Plants"
 
-def set_string_attr(prim, name, value):
-    attr = prim.CreateAttribute(name, Sdf.ValueTypeNames.String)
-    if attr:
-        attr.Set(value)
-        return True
-    return False
 
-
-PATH_PLANTS = "/World/Environment/Greenhouse/Plants"
+ZONE_NAMES = ("Zone_A", "Zone_B", "Zone_C")
 
 
 def iter_zone_prims(stage):
@@ -105,16 +75,128 @@ def iter_zone_prims(stage):
     plants = stage.GetPrimAtPath(PATH_PLANTS)
     if not plants or not plants.IsValid():
         return
-    for bed in sorted(plants.GetChildren(), key=lambda p: p.GetName()):
-        if not bed.GetName().startswith("Bed_"):
+    # One native traversal of Plants/Bed_*/Zones/Zone_*, pruning plant and other subtrees
+    found = []
+    it = iter(Usd.PrimRange(plants))
+    next(it)  # Plants itself
+    for prim in it:
+        name = prim.GetName()
+        parent_name = prim.GetParent().GetName()
+        if name.startswith("Bed_") and parent_name == "Plants":
             continue
-        zones_prim = stage.GetPrimAtPath(bed.GetPath().AppendPath("Zones"))
-        if not zones_prim or not zones_prim.IsValid():
+        if name == "Zones" and parent_name.startswith("Bed_"):
             continue
-        for zone_name in ["Zone_A", "Zone_B", "Zone_C"]:
-            zone = stage.GetPrimAtPath(zones_prim.GetPath().AppendPath(zone_name))
-            if zone and zone.IsValid():
-                yield zone, bed.GetName(), zone_name
+        if name in ZONE_NAMES and parent_name == "Zones":
+            found.append((prim, prim.GetParent().GetParent().GetName(), name))
+        it.PruneChildren()
+    found.sort(key=lambda z: (z[1], z[2]))
+    yield from found
+
+
+class Agent:
+    """Holds the masked stage, live_state layer and device prims across ticks.
+
+    The stage, live_state layer and prims are resolved once in __init__; tick() only reads
+    sensors, decides and writes Sdf specs to live_state, so a control loop never reopens the stage.
+    """
+
+    def __init__(self, stage_path):
+        # Only Devices and Plants are read or written; skip composing Structure and the rest
+        mask = Usd.StagePopulationMask()
+        mask.Add(Sdf.Path(PATH_DEVICES))
+        mask.Add(Sdf.Path(PATH_PLANTS))
+        self.stage = Usd.Stage.OpenMasked(stage_path, mask)
+        if not self.stage:
+            raise RuntimeError("Failed to open stage.")
+
+        self.live_layer = find_live_state_layer(self.stage)
+        if not self.live_layer:
+            raise RuntimeError("live_state.usda not found in layer stack.")
+
+        self.sensor = get_prim(self.stage, _SENSOR_PATH)
+        self.fan = get_prim(self.stage, _FAN_PATH)
+        self.vent = get_prim(self.stage, _VENT_PATH)
+        self.valve = get_prim(self.stage, _VALVE_PATH)
+        for name, prim in [("Sensor_01", self.sensor), ("Fan_01", self.fan), ("Vent_01", self.vent), ("Valve_01", self.valve)]:
+            if prim is None:
+                raise RuntimeError(f"Prim not found: /World/Environment/Greenhouse/Devices/{name}")
+
+        # Usd.AttributeQuery per (prim path, attr name). A query caches where its value
+        # resolves from, so any change to the stage (new live_state opinion, another
+        # layer edited or reloaded) drops the cache.
+        self._queries = {}
+        self._objects_changed = Tf.Notice.Register(
+            Usd.Notice.ObjectsChanged, self._on_objects_changed, self.stage)
+
+    def _on_objects_changed(self, notice, sender):
+        self._queries.clear()
+
+    def query_float(self, prim, name, default=None):
+        """Read a composed attribute value through a cached Usd.AttributeQuery."""
+        key = (prim.GetPath(), name)
+        query = self._queries.get(key)
+        if query is None:
+            attr = prim.GetAttribute(name)
+            if not attr:
+                return default
+            query = self._queries[key] = Usd.AttributeQuery(attr)
+        val = query.Get()
+        return val if val is not None else default
+
+    def tick(self):
+        """Run one read/decide/write pass. Returns (actions, dry_zones)."""
+        stage = self.stage
+        live_layer = self.live_layer
+
+        # Read composed sensor values (from any layer)
+        humidity = self.query_float(self.sensor, "sensor:humidityPct", 50.0)
+        print(f"Sensor (composed): humidity={humidity}%")
+
+        actions = []
+        tick_attr = self.sensor.GetAttribute("state:tick")
+        prev_tick = tick_attr.Get() if tick_attr else None
+
+        # All writes are Sdf specs on live_state inside one change block: one recompose, not ~30
+        with Sdf.ChangeBlock():
+            # Rule 1: humidity > 80 → fan 0.4, vent 20; else fan 0
+            if humidity > 80:
+                author_attr(live_layer, _FAN_PATH, "device:power", _VT_FLOAT, 0.4)
+                author_attr(live_layer, _VENT_PATH, "device:position", _VT_FLOAT, 20.0)
+                actions.append(f"Humidity {humidity}% → Fan 0.4, Vent 20")
+            else:
+                author_attr(live_layer, _FAN_PATH, "device:power", _VT_FLOAT, 0.0)
+                actions.append(f"Humidity {humidity}% → Fan 0")
+
+            # Rule 2: per-zone soil moisture and light; dry → valve 1 and mark status; shaded = annotate only
+            dry_zones = []
+            for zone_prim, bed_name, zone_name in iter_zone_prims(stage):
+                moisture = self.query_float(zone_prim, "zone:soilMoisturePct", 40.0)
+                light = self.query_float(zone_prim, "zone:lightPct", 70.0)
+                if moisture < 30:
+                    status = "dry"
+                    dry_zones.append(f"{bed_name}/{zone_name}")
+                elif light < 40:
+                    status = "shaded"
+                else:
+                    continue
+                # Only author the zones whose composed status actually changes
+                if get_string(zone_prim, "zone:status") != status:
+                    author_attr(live_layer, zone_prim.GetPath(), "zone:status", _VT_STRING, status)
+
+            if dry_zones:
+                author_attr(live_layer, _VALVE_PATH, "device:flow", _VT_FLOAT, 1.0)
+                actions.append(f"Dry zones ({len(dry_zones)}): {', '.join(dry_zones)} → Valve 1")
+            else:
+                author_attr(live_layer, _VALVE_PATH, "device:flow", _VT_FLOAT, 0.0)
+                actions.append("No dry zones → Valve 0")
+
+            # Increment state:tick on Sensor_01 (create if missing)
+            next_tick = (prev_tick if prev_tick is not None else 0) + 1
+            author_attr(live_layer, _SENSOR_PATH, "state:tick", _VT_INT, next_tick)
+            actions.append(f"state:tick = {next_tick}")
+
+        live_layer.Save()
+        return actions, dry_zones
 
 
 def main():
@@ -123,73 +205,16 @@ def main():
         print(f"Error: Stage not found: {stage_path}", file=sys.stderr)
         sys.exit(1)
 
-    stage = Usd.Stage.Open(stage_path)
-    if not stage:
-        print("Error: Failed to open stage.", file=sys.stderr)
-        sys.exit(1)
-
-    live_layer = find_live_state_layer(stage)
-    if not live_layer:
-        print("Error: live_state.usda not found in layer stack.", file=sys.stderr)
+    try:
+        agent = Agent(stage_path)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    sensor = get_prim(stage, PATH_SENSOR)
-    fan = get_prim(stage, PATH_FAN)
-    vent = get_prim(stage, PATH_VENT)
-    valve = get_prim(stage, PATH_VALVE)
-
-    for name, prim in [("Sensor_01", sensor), ("Fan_01", fan), ("Vent_01", vent), ("Valve_01", valve)]:
-        if prim is None:
-            print(f"Error: Prim not found: /World/Environment/Greenhouse/Devices/{name}", file=sys.stderr)
-            sys.exit(1)
-
-    # Read composed sensor values (from any layer)
-    humidity = get_float(sensor, "sensor:humidityPct", 50.0)
-
+    live_layer = agent.live_layer
     print(f"Editing layer: {live_layer.GetIdentifier() if hasattr(live_layer, 'GetIdentifier') else live_layer}")
-    print(f"Sensor (composed): humidity={humidity}%")
-
-    # Set edit target so all writes go to live_state only
-    stage.SetEditTarget(Usd.EditTarget(live_layer))
-
-    actions = []
-
-    # Rule 1: humidity > 80 → fan 0.4, vent 20; else fan 0
-    if humidity > 80:
-        set_float_attr(fan, "device:power", 0.4)
-        set_float_attr(vent, "device:position", 20.0)
-        actions.append(f"Humidity {humidity}% → Fan 0.4, Vent 20")
-    else:
-        set_float_attr(fan, "device:power", 0.0)
-        actions.append(f"Humidity {humidity}% → Fan 0")
-
-    # Rule 2: per-zone soil moisture and light; dry → valve 1 and mark status; shaded = annotate only
-    dry_zones = []
-    for zone_prim, bed_name, zone_name in iter_zone_prims(stage):
-        moisture = get_float(zone_prim, "zone:soilMoisturePct", 40.0)
-        light = get_float(zone_prim, "zone:lightPct", 70.0)
-        if moisture < 30:
-            set_string_attr(zone_prim, "zone:status", "dry")
-            dry_zones.append(f"{bed_name}/{zone_name}")
-        elif light < 40:
-            set_string_attr(zone_prim, "zone:status", "shaded")
 
-    if dry_zones:
-        set_float_attr(valve, "device:flow", 1.0)
-        actions.append(f"Dry zones ({len(dry_zones)}): {', '.join(dry_zones)} → Valve 1")
-    else:
-        set_float_attr(valve, "device:flow", 0.0)
-        actions.append("No dry zones → Valve 0")
-
-    # Increment state:tick on Sensor_01 (create if missing)
-    tick_attr = sensor.CreateAttribute("state:tick", Sdf.ValueTypeNames.Int)
-    if tick_attr:
-        prev = tick_attr.Get()
-        next_tick = (prev if prev is not None else 0) + 1
-        tick_attr.Set(next_tick)
-        actions.append(f"state:tick = {next_tick}")
-
-    live_layer.Save()
+    actions, dry_zones = agent.tick()
 
     # Summary
     print("\n--- Summary ---")
@@ -0,0 +1,54 @@
+"""
+USD helpers shared by the agents (cosmos_agent.py, simple_agent.py) and the
+src/usd_tools scripts that write live state (update_state.py, update_plant_health.py).
+
+All of them write only to usd/layers/live_state.usda (or its binary .usdc form);
+these locate that layer and author attribute specs on it directly.
+"""
+
+import os
+
+try:
+    from pxr import Sdf
+except ImportError:
+    Sdf = None  # callers check for pxr before authoring
+
+
+def live_state_paths():
+    """usd/layers/live_state as binary .usdc (scripts/export_usdc.py --live-state) or ASCII .usda."""
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    base = os.path.join(project_root, "usd", "layers", "live_state")
+    return (base + ".usdc", base + ".usda")
+
+
+def find_live_state_layer(stage):
+    """
+    Return the live_state layer (live_state.usda, or binary live_state.usdc) from the stage's layer stack.
+
+    The layer's path is known, so it is looked up directly in the layer registry
+    (the stage already opened it); identifiers are only scanned if that misses,
+    e.g. when the project is reached through a symlink.
+    """
+    try:
+        stack = stage.GetLayerStack()
+    except Exception:
+        return None
+    if Sdf is not None:
+        for path in live_state_paths():
+            layer = Sdf.Layer.Find(path)
+            if layer and layer in stack:
+                return layer
+    for layer in stack:
+        ident = layer.GetIdentifier() if hasattr(layer, "GetIdentifier") else str(layer)
+        if "live_state.usd" in ident:  # .usda or .usdc
+            return layer
+    return None
+
+
+def author_attr(layer, prim_path, name: str, type_name, value) -> None:
+    """Author an attribute default directly on layer (Sdf-only, safe inside Sdf.ChangeBlock)."""
+    prim_spec = Sdf.CreatePrimInLayer(layer, prim_path)
+    attr_spec = layer.GetAttributeAtPath(prim_spec.path.AppendProperty(name))
+    if not attr_spec:
+        attr_spec = Sdf.AttributeSpec(prim_spec, name, type_name)
+    attr_spec.default = value
@@ -23,10 +23,11 @@ STRUCTURE = BASE + "/Structure"
 PLANTS = BASE + "/Plants"
 
 # Prim paths in the composed stage (from structure.usda reference + plants.usda payload)
-PLASTIC_COVER_PATH = STRUCTURE + "/TunnelCover"
-BED_PATHS = [PLANTS + "/Bed_{:02d}/Bed".format(i) for i in range(1, 9)]           # Bed_01/Bed .. Bed_08/Bed
-PLANT_PATHS = [PLANTS + "/Bed_{:02d}/Plant_{:02d}".format(i, i) for i in range(1, 9)]
-WALKWAY_PATHS = [PLANTS + "/Walkways/Walkway_{:02d}".format(i) for i in range(1, 8)]
+# Parsed into Sdf.Path once here rather than on every override call
+PLASTIC_COVER_PATH = Sdf.Path(STRUCTURE + "/TunnelCover")
+BED_PATHS = tuple(Sdf.Path(f"{PLANTS}/Bed_{i:02d}/Bed") for i in range(1, 9))       # Bed_01/Bed .. Bed_08/Bed
+PLANT_PATHS = tuple(Sdf.Path(f"{PLANTS}/Bed_{i:02d}/Plant_{i:02d}") for i in range(1, 9))
+WALKWAY_PATHS = tuple(Sdf.Path(f"{PLANTS}/Walkways/Walkway_{i:02d}") for i in range(1, 8))
 
 
 def _project_root():
@@ -58,10 +59,19 @@ def create_material(stage, path, diffuse_color, roughness=0.5, metallic=0.0, opa
 
 
 def override_and_bind(stage, prim_path, material):
-    """Create an override prim at path and bind the material (for sublayer composition)."""
-    prim = stage.OverridePrim(prim_path)
-    if prim and material:
-        UsdShade.MaterialBindingAPI.Apply(prim).Bind(material)
+    """
+    Create an override prim at path and bind the material (for sublayer composition).
+
+    Authors the same specs as OverridePrim + MaterialBindingAPI.Apply().Bind(), but
+    directly on the root layer with the Sdf API so calls can be batched in a ChangeBlock.
+    """
+    if not material:
+        return
+    layer = stage.GetRootLayer()
+    prim_spec = Sdf.CreatePrimInLayer(layer, prim_path)
+    prim_spec.SetInfo("apiSchemas", Sdf.TokenListOp.Create(prependedItems=["MaterialBindingAPI"]))
+    rel_spec = Sdf.RelationshipSpec(prim_spec, "material:binding", custom=False)
+    rel_spec.targetPathList.explicitItems = [material.GetPath()]
 
 
 def main():
@@ -94,13 +104,14 @@ def main():
     )
 
     # --- Bind by overriding prims at actual scene paths (so sublayer applies the look) ---
-    override_and_bind(stage, PLASTIC_COVER_PATH, plastic_mat)
-    for p in BED_PATHS:
-        override_and_bind(stage, p, soil_mat)
-    for p in PLANT_PATHS:
-        override_and_bind(stage, p, plant_mat)
-    for p in WALKWAY_PATHS:
-        override_and_bind(stage, p, path_mat)
+    with Sdf.ChangeBlock():
+        override_and_bind(stage, PLASTIC_COVER_PATH, plastic_mat)
+        for p in BED_PATHS:
+            override_and_bind(stage, p, soil_mat)
+        for p in PLANT_PATHS:
+            override_and_bind(stage, p, plant_mat)
+        for p in WALKWAY_PATHS:
+            override_and_bind(stage, p, path_mat)
 
     stage.Save()
     print(f"Saved: {out_path}")
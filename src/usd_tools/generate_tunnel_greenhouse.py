@@ -9,7 +9,7 @@ import math
 import os
 
 try:
-    from pxr import Gf, Usd, UsdGeom, UsdShade, Sdf
+    from pxr import Gf, Usd, UsdGeom, UsdShade, Sdf, Vt
 except ImportError:
     raise ImportError("pxr not found. Use a Python environment with USD (e.g. Omniverse).")
 
@@ -46,35 +46,31 @@ def build_tunnel_mesh(stage, mesh_path):
     # Vertex grid: (length_segments+1) x (radial_segments+1)
     n_x = LENGTH_SEGMENTS + 1
     n_arc = RADIAL_SEGMENTS + 1
-    points = []
 
-    for ix in range(n_x):
-        x = -HALF_LENGTH + ix * (LENGTH / LENGTH_SEGMENTS)
-        for iarc in range(n_arc):
-            # Angle 0 -> pi: Y = HEIGHT*sin(angle), Z = -R*cos(angle) => span 2R = WIDTH, rise = HEIGHT
-            angle = iarc * (math.pi / RADIAL_SEGMENTS)
-            y = HEIGHT * math.sin(angle)
-            z = -R * math.cos(angle)
-            points.append(Gf.Vec3f(x, y, z))
+    # Arc profile is the same for every X slice: evaluate sin/cos once per arc vertex, not per point.
+    # Angle 0 -> pi: Y = HEIGHT*sin(angle), Z = -R*cos(angle) => span 2R = WIDTH, rise = HEIGHT
+    step = math.pi / RADIAL_SEGMENTS
+    profile = [(HEIGHT * math.sin(iarc * step), -R * math.cos(iarc * step)) for iarc in range(n_arc)]
+    dx = LENGTH / LENGTH_SEGMENTS
+    xs = [-HALF_LENGTH + ix * dx for ix in range(n_x)]
 
+    # One bulk VtArray instead of growing a Python list point by point
+    points = Vt.Vec3fArray([(x, y, z) for x in xs for y, z in profile])
     mesh.CreatePointsAttr(points)
 
-    # Triangle faces: quads between (ix, iarc) and (ix+1, iarc) and (ix+1, iarc+1) and (ix, iarc+1)
-    face_vertex_counts = []
-    face_vertex_indices = []
-
-    for ix in range(LENGTH_SEGMENTS):
-        for iarc in range(RADIAL_SEGMENTS):
-            i00 = ix * n_arc + iarc
-            i10 = (ix + 1) * n_arc + iarc
-            i11 = (ix + 1) * n_arc + (iarc + 1)
-            i01 = ix * n_arc + (iarc + 1)
-            # Two triangles per quad; winding for outward-facing normals (right-hand rule)
-            face_vertex_counts.extend([3, 3])
-            face_vertex_indices.extend([i00, i10, i11, i00, i11, i01])
+    # Quad faces: (ix, iarc) -> (ix+1, iarc) -> (ix+1, iarc+1) -> (ix, iarc+1)
+    # Winding for outward-facing normals (right-hand rule); Hydra triangulates at draw time
+    face_vertex_indices = Vt.IntArray([
+        i
+        for i00 in (ix * n_arc + iarc for ix in range(LENGTH_SEGMENTS) for iarc in range(RADIAL_SEGMENTS))
+        for i in (i00, i00 + n_arc, i00 + n_arc + 1, i00 + 1)
+    ])
+    face_vertex_counts = Vt.IntArray([4] * (LENGTH_SEGMENTS * RADIAL_SEGMENTS))
 
     mesh.CreateFaceVertexCountsAttr(face_vertex_counts)
     mesh.CreateFaceVertexIndicesAttr(face_vertex_indices)
+    # Polygonal, not subdivided: keep the flat-shaded look of the old triangle mesh
+    mesh.CreateSubdivisionSchemeAttr().Set(UsdGeom.Tokens.none)
 
     # Extent: X [-HALF_LENGTH, HALF_LENGTH], Y [0, HEIGHT], Z [-R, R]
     extent_min = Gf.Vec3f(-HALF_LENGTH, 0.0, -R)
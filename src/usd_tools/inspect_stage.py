@@ -56,28 +56,34 @@ def print_layer_stack(stage):
     print()
 
 
-def print_prim_tree(prim, indent=0):
+def print_prim_tree(prim):
     """Print prim path and type for prim and all descendants."""
-    prefix = "  " * indent
-    kind = prim.GetTypeName()
-    print(f"{prefix}{prim.GetPath()} [{kind}]")
-    for child in sorted(prim.GetChildren(), key=lambda p: str(p.GetPath())):
-        print_prim_tree(child, indent + 1)
+    # PrimRange walks in C++; sorting full path strings gives the same order as
+    # sorting siblings at every level (names never contain chars below '/')
+    base_depth = prim.GetPath().pathElementCount
+    rows = [(str(p.GetPath()), p.GetPath().pathElementCount - base_depth, p.GetTypeName())
+            for p in Usd.PrimRange(prim)]
+    rows.sort()
+    # One write for the whole tree instead of a print per prim
+    sys.stdout.write("".join(f"{'  ' * depth}{path} [{kind}]\n" for path, depth, kind in rows))
+
+
+_VALUE_NAMESPACES = ("device", "sensor", "state")
 
 
 def print_device_sensor_state_values(prim):
     """Print device:*, sensor:*, and state:* attribute values for prim and descendants."""
-    for attr in prim.GetAttributes():
-        name = attr.GetName()
-        if name.startswith("device:") or name.startswith("sensor:") or name.startswith("state:"):
-            try:
-                val = attr.Get()
-            except Exception:
-                val = "<error reading>"
-            if val is not None:
-                print(f"  {prim.GetPath()} {name} = {val}")
-    for child in prim.GetChildren():
-        print_device_sensor_state_values(child)
+    for p in Usd.PrimRange(prim):
+        for namespace in _VALUE_NAMESPACES:
+            for prop in p.GetAuthoredPropertiesInNamespace(namespace):
+                if not isinstance(prop, Usd.Attribute):
+                    continue
+                try:
+                    val = prop.Get()
+                except Exception:
+                    val = "<error reading>"
+                if val is not None:
+                    print(f"  {p.GetPath()} {prop.GetName()} = {val}")
 
 
 def print_plants_variant(stage, world_path):
@@ -9,17 +9,26 @@ Layout per bed (local bed space):
 - Row B: x = +0.2 m, plants every 0.4 m along Z, offset by 0.2 m (diagonal / staggered).
 
 Implementation notes:
-- We use regular USD prims (no PointInstancer) so each plant remains individually addressable.
+- By default we use regular USD prims (no PointInstancer) so each plant remains individually addressable.
+- With --point-instancer, each bed instead gets one UsdGeomPointInstancer per zone under
+  Bed_NN/ZonePlants/Zone_[ABC] (~24 prims instead of ~570). Materials then switch per zone
+  (update_plant_health.py binds the instancer), not per plant.
 - We keep the existing Bed_NN/Plant_NN prim in each bed and reuse it as one of the plants
   so that the existing plant_health variants (plant_states.usda) keep working.
 - The script is idempotent: re-running it will remove any extra Plant_* children under each bed
   and regenerate the rows, keeping only Plant_NN as the "representative" prim.
+- A hash of the layout parameters is stored as customData on /Plants; if it matches on a
+  re-run nothing is regenerated (pass --force to regenerate anyway).
 
 Run from anywhere (path is resolved from script location):
 
   python src/usd_tools/populate_bed_plants.py
+  python src/usd_tools/populate_bed_plants.py --point-instancer
 """
 
+import argparse
+import bisect
+import hashlib
 import os
 
 from pxr import Gf, Sdf, Usd, UsdGeom, UsdShade
@@ -43,6 +52,22 @@ Z_STEP = 0.4
 # Row B offset by half a step for diagonal/stagger
 Z_OFFSET_B = 0.2
 
+_PLANT_MAT_PATH = Sdf.Path("/World/Looks/PlantMat")
+
+# Point-instancer layout: Bed_NN/ZonePlants/Zone_X, zones split along Z as in update_plant_health.py
+INSTANCER_SCOPE = "ZonePlants"
+ZONE_BOUNDS_Z = (-2.67, 2.67)
+
+# customData key on /Plants recording the layout the beds were last generated with
+LAYOUT_HASH_KEY = "populate_bed_plants:layout_hash"
+
+
+def _layout_hash(point_instancer):
+    """Hash of every parameter that shapes the generated plants; equal hash => output unchanged."""
+    params = (PLANT_ASSET_PATH, PLANT_ASSET_PRIM_PATH, PLANT_Y, sorted(ROW_OFFSETS_X.items()),
+              Z_START_A, Z_END_A, Z_STEP, Z_OFFSET_B, ZONE_BOUNDS_Z, bool(point_instancer))
+    return hashlib.sha1(repr(params).encode()).hexdigest()
+
 
 def _iter_beds(plants_root_prim):
     """Yield (bed_number_int, bed_prim) for all Bed_XX children under /Plants."""
@@ -82,24 +107,33 @@ def _get_or_create_template_plant(stage, bed_prim, bed_num):
         # Bind to PlantMat material at the root stage path
         mat_api = UsdShade.MaterialBindingAPI.Apply(plant_prim)
         rel = mat_api.GetDirectBindingRel()
-        rel.SetTargets([Sdf.Path("/World/Looks/PlantMat")])
+        rel.SetTargets([_PLANT_MAT_PATH])
 
     return plant_prim
 
 
-def _clear_existing_plants(stage, bed_prim, template_plant_prim):
+def _stale_plant_names(bed_prim, template_plant_prim):
     """
-    Remove any Plant_* children under the bed except the template plant.
-    This keeps the script idempotent.
+    Return names of Plant_* children under the bed other than the template plant.
+    Removing these keeps the script idempotent.
     """
     template_path = template_plant_prim.GetPath()
-    children = list(bed_prim.GetChildren())
-    for child in children:
-        if not child.GetName().startswith("Plant_"):
-            continue
-        if child.GetPath() == template_path:
-            continue
-        stage.RemovePrim(child.GetPath())
+    return [
+        child.GetName()
+        for child in bed_prim.GetChildren()
+        if child.GetName().startswith("Plant_") and child.GetPath() != template_path
+    ]
+
+
+def _remove_prim_specs(layer, bed_path, names):
+    """Remove the named child prim specs of bed_path from layer (Sdf-only; safe inside a ChangeBlock)."""
+    bed_spec = layer.GetPrimAtPath(bed_path)
+    if not bed_spec:
+        return
+    for name in names:
+        child_spec = layer.GetPrimAtPath(bed_path.AppendChild(name))
+        if child_spec:
+            bed_spec.RemoveNameChild(child_spec)
 
 
 def _set_plant_transform(plant_prim, x, y, z):
@@ -123,80 +157,174 @@ def _set_plant_transform(plant_prim, x, y, z):
     op.Set(m)
 
 
-def _create_extra_plant(stage, bed_prim, bed_num, row_label, index, x, z):
+def _author_plant_spec(layer, plant_path):
     """
-    Create a new plant prim under a bed with a consistent naming scheme and
-    standard reference/material binding.
+    Author a def Mesh plant spec referencing the shared plant asset and bound to PlantMat.
 
     We use type "Mesh" (not "Xform") so the prim matches the referenced asset
     and renderers (usdview Hydra Storm, Omniverse) actually draw it. Xform
     prims with referenced geometry often get skipped by draw traversal.
+
+    Written with the Sdf API only (same specs DefinePrim/Bind would author)
+    so a whole bed can be generated inside one Sdf.ChangeBlock.
     """
-    name = f"Plant_{bed_num:02d}_{row_label}_{index:03d}"
-    prim_path = bed_prim.GetPath().AppendChild(name)
-    plant_prim = stage.DefinePrim(prim_path, "Mesh")
+    prim_spec = Sdf.CreatePrimInLayer(layer, plant_path)
+    prim_spec.specifier = Sdf.SpecifierDef
+    prim_spec.typeName = "Mesh"
 
     # Reference to the shared plant asset (brings in points, faceVertexIndices, etc.)
-    refs = plant_prim.GetReferences()
-    refs.ClearReferences()
-    refs.AddReference(PLANT_ASSET_PATH, PLANT_ASSET_PRIM_PATH)
+    prim_spec.referenceList.prependedItems = [Sdf.Reference(PLANT_ASSET_PATH, PLANT_ASSET_PRIM_PATH)]
 
-    plant_prim.SetInstanceable(False)
+    prim_spec.instanceable = False
 
     # Bind to PlantMat (green) from greenhouse_looks.usda; green shows when stage includes that layer
-    mat_api = UsdShade.MaterialBindingAPI.Apply(plant_prim)
-    rel = mat_api.GetDirectBindingRel()
-    rel.SetTargets([Sdf.Path("/World/Looks/PlantMat")])
+    prim_spec.SetInfo("apiSchemas", Sdf.TokenListOp.Create(prependedItems=["MaterialBindingAPI"]))
+    rel_spec = Sdf.RelationshipSpec(prim_spec, "material:binding", custom=False)
+    rel_spec.targetPathList.explicitItems = [_PLANT_MAT_PATH]
+    return prim_spec
 
-    _set_plant_transform(plant_prim, x, PLANT_Y, z)
 
+def _create_extra_plant(layer, bed_path, bed_num, row_label, index, x, z):
+    """
+    Author a new plant prim spec under a bed with a consistent naming scheme,
+    standard reference/material binding and its transform.
+    """
+    name = f"Plant_{bed_num:02d}_{row_label}_{index:03d}"
+    prim_spec = _author_plant_spec(layer, bed_path.AppendChild(name))
+
+    m = Gf.Matrix4d(1.0)
+    m.SetTranslate(Gf.Vec3d(x, PLANT_Y, z))
+    Sdf.AttributeSpec(prim_spec, "xformOp:transform", Sdf.ValueTypeNames.Matrix4d).default = m
+    order_spec = Sdf.AttributeSpec(prim_spec, "xformOpOrder", Sdf.ValueTypeNames.TokenArray, Sdf.VariabilityUniform)
+    order_spec.default = ["xformOp:transform"]
+
+    return prim_spec.path
+
+
+def _copy_extra_plant(layer, proto_path, bed_path, bed_num, row_label, index, x, z):
+    """
+    Clone an already-authored plant spec (see _create_extra_plant) and move it.
+
+    Plants differ only by name and translation, so Sdf.CopySpec duplicates the
+    reference, binding and xformOpOrder as data and only the transform is reset.
+    """
+    name = f"Plant_{bed_num:02d}_{row_label}_{index:03d}"
+    plant_path = bed_path.AppendChild(name)
+    Sdf.CopySpec(layer, proto_path, layer, plant_path)
 
-def populate_beds(stage):
+    m = Gf.Matrix4d(1.0)
+    m.SetTranslate(Gf.Vec3d(x, PLANT_Y, z))
+    layer.GetAttributeAtPath(plant_path.AppendProperty("xformOp:transform")).default = m
+
+
+def _create_zone_instancers(layer, bed_path, row_points):
+    """
+    Author Bed_NN/ZonePlants/Zone_[ABC] PointInstancers, one per zone, each with a
+    single plant prototype. row_points is a list of (x, z) plant positions.
+    """
+    scope_spec = Sdf.CreatePrimInLayer(layer, bed_path.AppendChild(INSTANCER_SCOPE))
+    scope_spec.specifier = Sdf.SpecifierDef
+    scope_spec.typeName = "Scope"
+
+    by_zone = {}
+    for x, z in row_points:
+        by_zone.setdefault("ABC"[bisect.bisect_right(ZONE_BOUNDS_Z, z)], []).append(Gf.Vec3f(x, PLANT_Y, z))
+
+    for zone_letter, positions in sorted(by_zone.items()):
+        inst_spec = Sdf.CreatePrimInLayer(layer, scope_spec.path.AppendChild(f"Zone_{zone_letter}"))
+        inst_spec.specifier = Sdf.SpecifierDef
+        inst_spec.typeName = "PointInstancer"
+
+        protos_spec = Sdf.CreatePrimInLayer(layer, inst_spec.path.AppendChild("Prototypes"))
+        protos_spec.specifier = Sdf.SpecifierDef
+        protos_spec.typeName = "Scope"
+        proto_path = _author_plant_spec(layer, protos_spec.path.AppendChild("Plant")).path
+
+        Sdf.AttributeSpec(inst_spec, "positions", Sdf.ValueTypeNames.Point3fArray).default = positions
+        Sdf.AttributeSpec(inst_spec, "protoIndices", Sdf.ValueTypeNames.IntArray).default = [0] * len(positions)
+        rel_spec = Sdf.RelationshipSpec(inst_spec, "prototypes", custom=False)
+        rel_spec.targetPathList.explicitItems = [proto_path]
+
+
+def populate_beds(stage, point_instancer=False, force=False):
+    """
+    Regenerate the plants of every bed. Returns False (and writes nothing) when the
+    beds were already generated with the same layout and force is not set.
+    """
     plants_root = stage.GetPrimAtPath("/World/Environment/Greenhouse/Plants")
     if not plants_root or not plants_root.IsValid():
         raise RuntimeError("Could not find /World/Environment/Greenhouse/Plants in stage.")
 
+    layout_hash = _layout_hash(point_instancer)
+    if not force and plants_root.GetCustomDataByKey(LAYOUT_HASH_KEY) == layout_hash:
+        return False
+
+    layer = stage.GetEditTarget().GetLayer()
+
+    # Row A: x = -0.2, z from -7.0 to +7.0 inclusive
+    x_a = ROW_OFFSETS_X["A"]
+    num_steps_a = int(round((Z_END_A - Z_START_A) / Z_STEP)) + 1
+    zs_a = [Z_START_A + i * Z_STEP for i in range(num_steps_a)]
+
+    # Row B: x = +0.2, same span but offset by half a step
+    x_b = ROW_OFFSETS_X["B"]
+    z_start_b = Z_START_A + Z_OFFSET_B
+    z_end_b = Z_END_A - Z_OFFSET_B
+    num_steps_b = int(round((z_end_b - z_start_b) / Z_STEP)) + 1
+    zs_b = [z_start_b + i * Z_STEP for i in range(num_steps_b)]
+
     for bed_num, bed_prim in _iter_beds(plants_root):
         print(f"Populating Bed_{bed_num:02d}")
+        bed_path = bed_prim.GetPath()
+
+        # Composed reads and Usd-level edits happen before the change block
         template = _get_or_create_template_plant(stage, bed_prim, bed_num)
+        stale = _stale_plant_names(bed_prim, template)
 
-        # Remove any old generated plants so we can regenerate deterministically
-        _clear_existing_plants(stage, bed_prim, template)
-
-        # Row A: x = -0.2, z from -7.0 to +7.0 inclusive
-        x_a = ROW_OFFSETS_X["A"]
-        num_steps_a = int(round((Z_END_A - Z_START_A) / Z_STEP)) + 1
-        center_used = False
-        idx_a = 0
-        for i in range(num_steps_a):
-            z = Z_START_A + i * Z_STEP
-
-            # Use the template plant for the central position (z ~ 0) so variants keep working
-            if not center_used and abs(z) < 1e-6:
-                _set_plant_transform(template, x_a, PLANT_Y, z)
-                center_used = True
-                continue
+        # Use the template plant for the central position (z ~ 0) so variants keep working
+        center = next((i for i, z in enumerate(zs_a) if abs(z) < 1e-6), None)
+        if center is not None:
+            _set_plant_transform(template, x_a, PLANT_Y, zs_a[center])
 
-            _create_extra_plant(stage, bed_prim, bed_num, "A", idx_a, x_a, z)
-            idx_a += 1
+        # Hundreds of plant specs per bed: one recompose instead of one per edit
+        with Sdf.ChangeBlock():
+            # Remove any old generated plants/instancers so we can regenerate deterministically
+            _remove_prim_specs(layer, bed_path, stale + [INSTANCER_SCOPE])
 
-        # Row B: x = +0.2, same span but offset by half a step
-        x_b = ROW_OFFSETS_X["B"]
-        z_start_b = Z_START_A + Z_OFFSET_B
-        z_end_b = Z_END_A - Z_OFFSET_B
-        num_steps_b = int(round((z_end_b - z_start_b) / Z_STEP)) + 1
+            if point_instancer:
+                row_points = [(x_a, z) for i, z in enumerate(zs_a) if i != center] + [(x_b, z) for z in zs_b]
+                _create_zone_instancers(layer, bed_path, row_points)
+                continue
 
-        for i in range(num_steps_b):
-            z = z_start_b + i * Z_STEP
-            _create_extra_plant(stage, bed_prim, bed_num, "B", i, x_b, z)
+            # The first generated plant is authored in full; the rest are copies of its spec
+            proto_path = None
+            rows = [("A", x_a, [z for i, z in enumerate(zs_a) if i != center]), ("B", x_b, zs_b)]
+            for row_label, x, zs in rows:
+                for idx, z in enumerate(zs):
+                    if proto_path is None:
+                        proto_path = _create_extra_plant(layer, bed_path, bed_num, row_label, idx, x, z)
+                    else:
+                        _copy_extra_plant(layer, proto_path, bed_path, bed_num, row_label, idx, x, z)
+
+    plants_root.SetCustomDataByKey(LAYOUT_HASH_KEY, layout_hash)
+    return True
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Populate greenhouse beds with plant rows")
+    parser.add_argument("--point-instancer", action="store_true",
+                        help="Generate one PointInstancer per zone instead of individual plant prims")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate even if the beds already match the current layout")
+    args = parser.parse_args()
+
     stage = Usd.Stage.Open(STAGE_PATH)
     if not stage:
         raise RuntimeError(f"Failed to open stage at {STAGE_PATH}")
 
-    populate_beds(stage)
+    if not populate_beds(stage, point_instancer=args.point_instancer, force=args.force):
+        print(f"Beds already up to date in {STAGE_PATH} (use --force to regenerate)")
+        return
 
     print(f"Saving populated beds to {STAGE_PATH}")
     stage.GetRootLayer().Save()
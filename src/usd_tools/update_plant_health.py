@@ -20,6 +20,7 @@ Usage:
 """
 
 import argparse
+import bisect
 import os
 import re
 import sys
@@ -32,6 +33,10 @@ except ImportError:
     print("Error: pxr (USD) not found.", file=sys.stderr)
     sys.exit(1)
 
+# Shared live_state helpers live with the agents (src/agent/usd_helpers.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agent"))
+from usd_helpers import find_live_state_layer  # noqa: E402
+
 
 def _project_root():
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -51,24 +56,16 @@ MAT_UNHEALTHY = "/World/Looks/UnhealthyPlantMat"
 ZONE_A_MAX_Z = -2.67  # Zone_A: Z < -2.67
 ZONE_B_MAX_Z = 2.67   # Zone_B: -2.67 <= Z <= 2.67
                        # Zone_C: Z > 2.67
+_ZONE_BOUNDS_Z = (ZONE_A_MAX_Z, ZONE_B_MAX_Z)
 
 # Plant layout: Row A starts at Z=-7.0, Row B at Z=-6.8, step=0.4m
 ROW_A_START_Z = -7.0
 ROW_B_START_Z = -6.8
 PLANT_SPACING = 0.4
+_ROW_START_Z = {"A": ROW_A_START_Z, "B": ROW_B_START_Z}
 
-
-def find_live_state_layer(stage):
-    """Return the live_state.usda layer from the stage's layer stack."""
-    try:
-        stack = stage.GetLayerStack()
-    except Exception:
-        return None
-    for layer in stack:
-        ident = layer.GetIdentifier() if hasattr(layer, "GetIdentifier") else str(layer)
-        if "live_state.usda" in ident:
-            return layer
-    return None
+# Generated plants (populate_bed_plants.py): Plant_NN_<row>_<index>
+_PLANT_RE = re.compile(r"Plant_\d{2}_([AB])_(\d{3})")
 
 
 def parse_zone_id(zone_id: str):
@@ -79,79 +76,134 @@ def parse_zone_id(zone_id: str):
     return int(m.group(1)), m.group(2)
 
 
-def get_zone_z_range(zone_letter: str) -> tuple[float, float]:
-    """Return (min_z, max_z) for a zone letter."""
-    if zone_letter == "A":
-        return -8.0, ZONE_A_MAX_Z
-    elif zone_letter == "B":
-        return ZONE_A_MAX_Z, ZONE_B_MAX_Z
-    else:  # C
-        return ZONE_B_MAX_Z, 8.0
-
-
-def get_plants_in_zone(stage, bed_num: int, zone_letter: str) -> list[str]:
+def get_plants_by_zone(stage, bed_num: int) -> dict[str, list[str]]:
     """
-    Return list of plant prim paths that are in the given zone.
+    Return {zone_letter: [plant prim paths]} for one bed.
 
-    Plants are located based on their Z coordinate relative to zone boundaries.
+    Each plant's Z coordinate is binned against the zone boundaries, so all three
+    zones of a bed cost a single pass. Z comes from the name for generated plants
+    and from xformOp:transform for anything else (e.g. the Plant_NN template).
     """
     bed_path = f"/World/Environment/Greenhouse/Plants/Bed_{bed_num:02d}"
     bed_prim = stage.GetPrimAtPath(bed_path)
     if not bed_prim or not bed_prim.IsValid():
-        return []
-
-    min_z, max_z = get_zone_z_range(zone_letter)
-    plants_in_zone = []
+        return {}
 
+    by_zone: dict[str, list[str]] = {}
     for child in bed_prim.GetChildren():
-        name = child.GetName()
         # Match plant names: Plant_NN, Plant_NN_A_XXX, Plant_NN_B_XXX
-        if not name.startswith("Plant_"):
+        if not child.GetName().startswith("Plant_"):
             continue
 
-        # Get the plant's Z position from its transform
-        xform_attr = child.GetAttribute("xformOp:transform")
-        if not xform_attr:
+        # Generated plants sit on a fixed grid: derive Z from the name, no attribute read
+        m = _PLANT_RE.fullmatch(child.GetName())
+        if m:
+            z_pos = _ROW_START_Z[m.group(1)] + int(m.group(2)) * PLANT_SPACING
+        else:
+            xform_attr = child.GetAttribute("xformOp:transform")
+            if not xform_attr:
+                continue
+            transform = xform_attr.Get()
+            if transform is None:
+                continue
+
+            # Translation is in the 4th row (index 3) of the row-major 4x4 matrix
+            z_pos = transform[3][2]
+
+        if z_pos < -8.0:
             continue
+        zone_letter = "ABC"[bisect.bisect_right(_ZONE_BOUNDS_Z, z_pos)]
+        by_zone.setdefault(zone_letter, []).append(child.GetPath().pathString)
 
-        transform = xform_attr.Get()
-        if transform is None:
-            continue
-
-        # Extract Z translation from the 4x4 matrix (row 3, column 2 in 0-indexed)
-        # Matrix is row-major: ((r0c0,r0c1,r0c2,r0c3), (r1c0,...), ...)
-        # Translation is in the 4th row (index 3)
-        z_pos = transform[3][2]
+    return by_zone
 
-        # Check if plant is in this zone
-        if min_z <= z_pos < max_z or (zone_letter == "C" and z_pos >= max_z - 0.1):
-            plants_in_zone.append(child.GetPath().pathString)
 
-    return plants_in_zone
+def get_zone_instancer(stage, bed_num: int, zone_letter: str):
+    """
+    Return (instancer path, instance count) for a bed populated with
+    populate_bed_plants.py --point-instancer, else None.
+    """
+    inst_path = f"/World/Environment/Greenhouse/Plants/Bed_{bed_num:02d}/ZonePlants/Zone_{zone_letter}"
+    prim = stage.GetPrimAtPath(inst_path)
+    if not prim or not prim.IsValid():
+        return None
+    positions = prim.GetAttribute("positions").Get() if prim.HasAttribute("positions") else None
+    return inst_path, len(positions) if positions is not None else 0
 
 
-def update_plant_materials(stage, live_layer, plant_paths: list[str], healthy: bool) -> int:
+def get_plants_in_zone(stage, bed_num: int, zone_letter: str) -> list[str]:
     """
-    Update material bindings for the given plants.
+    Return list of plant prim paths that are in the given zone.
 
-    Returns count of plants updated.
+    Plants are located based on their Z coordinate relative to zone boundaries.
     """
-    material_path = MAT_HEALTHY if healthy else MAT_UNHEALTHY
-    count = 0
+    return get_plants_by_zone(stage, bed_num).get(zone_letter, [])
 
+
+def _binding_targets(stage, plant_paths: list[str]) -> list[tuple]:
+    """Resolve plant paths to (prim path, has MaterialBindingAPI) for the valid prims."""
+    targets = []
     for plant_path in plant_paths:
         prim = stage.GetPrimAtPath(plant_path)
         if not prim or not prim.IsValid():
             continue
+        targets.append((prim.GetPath(), prim.HasAPI(UsdShade.MaterialBindingAPI)))
+    return targets
+
 
+def _author_bindings(live_layer, targets: list[tuple], material_path: str) -> None:
+    """
+    Author direct material:binding specs on live_layer with the Sdf API.
+
+    Equivalent to MaterialBindingAPI.Bind(material, strongerThanDescendants) but
+    safe inside an Sdf.ChangeBlock.
+    """
+    mat_path = Sdf.Path(material_path)
+    strength = UsdShade.Tokens.strongerThanDescendants
+    for prim_path, has_api in targets:
+        # Already bound to this material on live_state: nothing to author
+        rel_spec = live_layer.GetRelationshipAtPath(prim_path.AppendProperty("material:binding"))
+        if (rel_spec and list(rel_spec.targetPathList.explicitItems) == [mat_path]
+                and rel_spec.GetInfo("bindMaterialAs") == strength):
+            continue
+
+        prim_spec = Sdf.CreatePrimInLayer(live_layer, prim_path)
+        if not has_api:
+            schemas = prim_spec.GetInfo("apiSchemas")
+            if "MaterialBindingAPI" not in schemas.prependedItems:
+                schemas.prependedItems = list(schemas.prependedItems) + ["MaterialBindingAPI"]
+                prim_spec.SetInfo("apiSchemas", schemas)
+
+        if not rel_spec:
+            rel_spec = Sdf.RelationshipSpec(prim_spec, "material:binding", custom=False)
+        rel_spec.targetPathList.explicitItems = [mat_path]
         # Stronger-than-descendants so live_state wins over root's weakerThanDescendants
-        binding_api = UsdShade.MaterialBindingAPI(prim)
-        material = UsdShade.Material.Get(stage, material_path)
-        if material:
-            binding_api.Bind(material, UsdShade.Tokens.strongerThanDescendants)
-            count += 1
+        rel_spec.SetInfo("bindMaterialAs", strength)
+
+
+def resolve_materials(stage) -> dict[str, bool]:
+    """Look up MAT_HEALTHY and MAT_UNHEALTHY once; returns {material path: exists on stage}."""
+    return {path: bool(UsdShade.Material.Get(stage, path)) for path in (MAT_HEALTHY, MAT_UNHEALTHY)}
+
+
+def update_plant_materials(stage, live_layer, plant_paths: list[str], healthy: bool,
+                           materials: dict[str, bool] | None = None) -> int:
+    """
+    Update material bindings for the given plants.
+
+    Pass materials from resolve_materials() when calling repeatedly on the same stage.
+    Returns count of plants updated.
+    """
+    if materials is None:
+        materials = resolve_materials(stage)
+    material_path = MAT_HEALTHY if healthy else MAT_UNHEALTHY
+    if not materials[material_path]:
+        return 0
 
-    return count
+    targets = _binding_targets(stage, plant_paths)
+    with Sdf.ChangeBlock():
+        _author_bindings(live_layer, targets, material_path)
+    return len(targets)
 
 
 def get_zone_status(stage, bed_num: int, zone_letter: str) -> str:
@@ -173,21 +225,37 @@ def sync_all_zones(stage, live_layer) -> list[str]:
     """
     Sync plant materials for all zones based on their current status.
 
+    All zone statuses and plant prims are read first; the bindings for every
+    zone are then authored in a single Sdf.ChangeBlock.
+
     Returns list of actions taken.
     """
-    actions = []
+    materials = resolve_materials(stage)
 
+    pending = []
     for bed_num in range(1, 9):
+        plants_by_zone = get_plants_by_zone(stage, bed_num)
         for zone_letter in ["A", "B", "C"]:
+            plants = plants_by_zone.get(zone_letter, [])
+            # Point-instanced beds: one binding on the zone instancer covers all its plants
+            instancer = get_zone_instancer(stage, bed_num, zone_letter)
+            if instancer:
+                plants = plants + [instancer[0]]
+            if not plants:
+                continue
             status = get_zone_status(stage, bed_num, zone_letter)
             healthy = status == "ok"
+            material_path = MAT_HEALTHY if healthy else MAT_UNHEALTHY
+            targets = _binding_targets(stage, plants) if materials[material_path] else []
+            plant_count = len(targets) + (instancer[1] - 1 if instancer and targets else 0)
+            pending.append((f"B{bed_num:02d}-{zone_letter}", status, healthy, material_path, targets, plant_count))
 
-            plants = get_plants_in_zone(stage, bed_num, zone_letter)
-            if plants:
-                count = update_plant_materials(stage, live_layer, plants, healthy)
-                zone_id = f"B{bed_num:02d}-{zone_letter}"
-                mat_name = "PlantMat" if healthy else "UnhealthyPlantMat"
-                actions.append(f"{zone_id}: {count} plants → {mat_name} (status={status})")
+    actions = []
+    with Sdf.ChangeBlock():
+        for zone_id, status, healthy, material_path, targets, plant_count in pending:
+            _author_bindings(live_layer, targets, material_path)
+            mat_name = "PlantMat" if healthy else "UnhealthyPlantMat"
+            actions.append(f"{zone_id}: {plant_count} plants → {mat_name} (status={status})")
 
     return actions
 
@@ -235,7 +303,8 @@ def main():
         actions = sync_all_zones(stage, live_layer)
         for a in actions:
             print(f"  {a}")
-        live_layer.Save()
+        if live_layer.dirty:
+            live_layer.Save()
         print(f"\nUpdated {len(actions)} zones. Reload stage in USD Composer to see changes.")
         return
 
@@ -269,12 +338,17 @@ def main():
     zone_path = f"/World/Environment/Greenhouse/Plants/Bed_{bed_num:02d}/Zones/Zone_{zone_letter}"
     zone_prim = stage.GetPrimAtPath(zone_path)
     if zone_prim and zone_prim.IsValid():
-        status_attr = zone_prim.CreateAttribute("zone:status", Sdf.ValueTypeNames.String)
-        if status_attr:
-            status_attr.Set(args.status)
-            print(f"Set {args.zone} zone:status = '{args.status}'")
-
-    live_layer.Save()
+        if get_zone_status(stage, bed_num, zone_letter) == args.status:
+            print(f"{args.zone} zone:status already '{args.status}'")
+        else:
+            status_attr = zone_prim.CreateAttribute("zone:status", Sdf.ValueTypeNames.String)
+            if status_attr:
+                status_attr.Set(args.status)
+                print(f"Set {args.zone} zone:status = '{args.status}'")
+
+    # Skip the file write when every binding and the status were already current
+    if live_layer.dirty:
+        live_layer.Save()
     print("\nReload stage in USD Composer to see changes.")
 
 
@@ -2,32 +2,127 @@
 """
 Update live telemetry and actuator state by writing ONLY to usd/layers/live_state.usda.
 
-Uses pxr (Usd, Sdf). Sets edit target to the live_state layer, then creates/updates
-attributes on device and sensor prims. Saves only the live_state layer.
+Uses pxr (Usd, Sdf), imported on first use so the path helpers import cheaply. Finds the
+live_state layer in the stage's layer stack and authors attribute specs on it directly
+(no edit target needed). Saves only the live_state layer.
 
 Run from project root (or any cwd; paths resolved from script location):
   python src/usd_tools/update_state.py --temp 28 --humidity 90 --fan 0.5
   python src/usd_tools/update_state.py --tick --last-updated "2026-02-10T12:00:00"
+  python src/usd_tools/update_state.py --zones-json snapshot.json
+  python src/usd_tools/update_state.py --json --temp 28     # one JSON line, for controllers
+  python src/usd_tools/update_state.py --batch edits.json   # many writes, one process
+
+--batch applies a transaction file of arbitrary live_state writes, all validated first and
+then authored in one change block with a single save:
+  [{"path": "/World/Environment/Greenhouse/Devices/Fan_01", "attr": "device:power", "type": "float", "value": 0.8},
+   {"path": "/World/Environment/Greenhouse/Plants/Bed_03/Zones/Zone_C", "attr": "zone:status", "type": "string", "value": "dry"}]
+Types: float, bool, string, int, float[].
+
+--zones-json writes a whole zone snapshot as float[] arrays on the Plants prim
+(zone:soilMoisturePct, zone:lightPct, zone:healthScore; index B01-A=0, B01-B=1, ... B08-C=23)
+in one change block. Snapshot format:
+  {"B01-A": {"moisture": 22, "light": 80, "health": 0.9}, "B03-C": {"moisture": 18}}
+Zones or fields missing from the snapshot keep their current array values (NaN if never set).
+
+--no-stage skips opening the stage altogether: prim paths are validated against
+usd/layers/live_state.manifest.json and live_state is edited through Sdf alone. Build the
+manifest once (and again after changing greenhouse.usda or its components; a stale
+manifest is refused):
+  python src/usd_tools/update_state.py --write-manifest
+  python src/usd_tools/update_state.py --no-stage --temp 28 --tick
+
+Daemon mode keeps the stage open and applies one JSON command per line, so repeated
+telemetry updates skip the stage open/composition cost:
+  python src/usd_tools/update_state.py --daemon                      # commands on stdin
+  python src/usd_tools/update_state.py --daemon --socket /tmp/gh.sock
+  python src/usd_tools/update_state_client.py --socket /tmp/gh.sock '{"temp": 28, "tick": true}'
+
+On Linux the script re-executes itself with jemalloc preloaded when the library is
+installed and LD_PRELOAD is not already set; USD stage composition allocates heavily
+from many threads and glibc malloc scales poorly there. Equivalent manual form:
+  env LD_PRELOAD=/usr/lib/x86_64-linux-gnu/libjemalloc.so.2 python src/usd_tools/update_state.py ...
+Set GREENHOUSE_NO_JEMALLOC=1 to disable.
 """
 
 import argparse
+import importlib.util
+import json
+import math
 import os
+import re
+import socketserver
 import sys
+import threading
+from functools import lru_cache
 
-try:
-    from pxr import Sdf, Usd
-except ImportError:
-    print("Error: pxr (Usd, Sdf) not found. Use a Python environment with USD.", file=sys.stderr)
-    sys.exit(1)
+# Shared live_state helpers live with the agents (src/agent/usd_helpers.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agent"))
 
+# pxr is imported on first use: zone_id_to_prim_path and the other path helpers stay
+# cheap to import (USD's import costs 100ms+) for callers that never touch a stage
+Sdf = Usd = Vt = None
 
+
+def _load_pxr():
+    """Bind Sdf/Usd/Vt for this module; raises ImportError if USD is not installed."""
+    global Sdf, Usd, Vt
+    if Sdf is None:
+        from pxr import Sdf, Usd, Vt
+
+
+# Common install locations of jemalloc (Debian/Ubuntu multiarch, RHEL/Fedora, source builds)
+_JEMALLOC_CANDIDATES = (
+    "/usr/lib/x86_64-linux-gnu/libjemalloc.so.2",
+    "/usr/lib/aarch64-linux-gnu/libjemalloc.so.2",
+    "/usr/lib64/libjemalloc.so.2",
+    "/usr/local/lib/libjemalloc.so.2",
+)
+
+
+def _maybe_reexec_with_jemalloc():
+    """Re-exec this process with jemalloc in LD_PRELOAD if available; returns only if not re-executed."""
+    if not sys.platform.startswith("linux"):
+        return
+    if os.environ.get("LD_PRELOAD") or os.environ.get("GREENHOUSE_NO_JEMALLOC"):
+        return
+    lib = next((path for path in _JEMALLOC_CANDIDATES if os.path.isfile(path)), None)
+    if lib is None:
+        return
+    env = dict(os.environ, LD_PRELOAD=lib)
+    try:
+        os.execve(sys.executable, [sys.executable] + sys.argv, env)
+    except OSError:
+        pass  # fall back to the default allocator
+
+
+@lru_cache(maxsize=None)
 def _project_root():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.dirname(os.path.dirname(script_dir))
 
 
+@lru_cache(maxsize=None)
 def _greenhouse_stage_path():
-    return os.path.join(_project_root(), "usd", "root", "greenhouse.usda")
+    """
+    Root stage; prefers the binary greenhouse.usdc (scripts/export_usdc.py) unless it is stale.
+
+    export_usdc.py records the mtime of every layer it exported (root and plants.usda)
+    next to the .usdc; if any source changed since, or the record is missing, the
+    .usdc (and the binary copies it references) is out of date and greenhouse.usda is used.
+    """
+    root = _project_root()
+    usda = os.path.join(root, "usd", "root", "greenhouse.usda")
+    usdc = os.path.splitext(usda)[0] + ".usdc"
+    try:
+        with open(usdc + ".sources.json", encoding="utf-8") as f:
+            sources = json.load(f)
+        if os.path.isfile(usdc) and all(os.stat(os.path.join(root, rel_path)).st_mtime_ns == mtime
+                                        for rel_path, mtime in sources.items()):
+            return usdc
+    except (OSError, ValueError, AttributeError):
+        pass
+    return usda
 
 
 # Prim paths under /World/Environment/Greenhouse/Devices
@@ -39,10 +134,37 @@ PATH_DEVICES = "/World/Environment/Greenhouse/Devices"
 PATH_PLANTS = "/World/Environment/Greenhouse/Plants"
 
 
+@lru_cache(maxsize=None)
+def _sdf_path(path):
+    """Sdf.Path for a path string, parsed once: prim lookups and spec writes take these."""
+    return Sdf.Path(path)
+
+
+# Zone SoA layout on the Plants prim: one array element per zone, in bed-major order
+ZONE_IDS = tuple(f"B{bed:02d}-{letter}" for bed in range(1, 9) for letter in "ABC")
+_ZONE_INDEX = {zone_id: index for index, zone_id in enumerate(ZONE_IDS)}
+
+# Snapshot field -> float[] attribute on PATH_PLANTS
+ZONE_ARRAY_FIELDS = (
+    ("moisture", "zone:soilMoisturePct"),
+    ("light", "zone:lightPct"),
+    ("health", "zone:healthScore"),
+)
+
+
+_ZONE_RE = re.compile(r"^B(\d{2})-([ABC])$")
+# Known zones resolve by lookup; only ids outside Bed_01..Bed_08 go through the regex
+_ZONE_PATHS = {zone_id: f"{PATH_PLANTS}/Bed_{zone_id[1:3]}/Zones/Zone_{zone_id[4]}" for zone_id in ZONE_IDS}
+
+
+@lru_cache(maxsize=128)
 def zone_id_to_prim_path(zone_id):
     """Convert zone id (e.g. B01-A, B04-B) to prim path. Returns None if invalid."""
-    import re
-    m = re.match(r"^B(\d{2})-([ABC])$", zone_id.strip().upper())
+    zone_id = zone_id.strip().upper()
+    path = _ZONE_PATHS.get(zone_id)
+    if path is not None:
+        return path
+    m = _ZONE_RE.match(zone_id)
     if not m:
         return None
     bed_num = m.group(1)
@@ -50,60 +172,389 @@ def zone_id_to_prim_path(zone_id):
     return f"{PATH_PLANTS}/Bed_{bed_num}/Zones/Zone_{zone_letter}"
 
 
+def zone_id_to_index(zone_id):
+    """Convert zone id (e.g. B01-A -> 0, B01-B -> 1, B02-A -> 3) to its array index. Returns None if invalid."""
+    return _ZONE_INDEX.get(zone_id.strip().upper())
+
+
+def load_zone_snapshot(path):
+    """Read a --zones-json snapshot; returns {zone index: {field: float}}. Raises ValueError."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cannot read zone snapshot {path}: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("Zone snapshot must be a JSON object keyed by zone id")
+    fields = {field for field, _ in ZONE_ARRAY_FIELDS}
+    snapshot = {}
+    for zone_id, record in data.items():
+        index = zone_id_to_index(zone_id)
+        if index is None:
+            raise ValueError(f"Invalid zone id {zone_id!r} in snapshot")
+        if not isinstance(record, dict) or not set(record) <= fields:
+            raise ValueError(f"Zone {zone_id}: expected an object with fields {sorted(fields)}")
+        try:
+            snapshot[index] = {field: float(value) for field, value in record.items()}
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Zone {zone_id}: {e}") from e
+    return snapshot
+
+
+def zone_array_values(stage, live_layer, manifest, snapshot, create=True):
+    """
+    Merge snapshot into the current zone arrays (see current_value).
+
+    Returns [(attribute name, values, zones set)] for each field the snapshot touches.
+    With create=False, fields whose array is not authored yet are skipped.
+    """
+    result = []
+    for field, attr_name in ZONE_ARRAY_FIELDS:
+        updates = {index: record[field] for index, record in snapshot.items() if field in record}
+        if not updates:
+            continue
+        current = current_value(stage, live_layer, manifest, _sdf_path(PATH_PLANTS), attr_name)
+        if current is not None and len(current) == len(ZONE_IDS):
+            values = list(current)
+        elif create:
+            values = [math.nan] * len(ZONE_IDS)
+        else:
+            continue
+        for index, value in updates.items():
+            values[index] = value
+        result.append((attr_name, values, len(updates)))
+    return result
+
+
+def zone_prim_values(stage, manifest, snapshot):
+    """Per-zone attribute writes mirroring snapshot: [(zone prim path, attribute name, value)] for existing zone prims."""
+    result = []
+    for index, record in sorted(snapshot.items()):
+        zone_path = _sdf_path(_ZONE_PATHS[ZONE_IDS[index]])
+        if not prim_exists(stage, manifest, zone_path):
+            continue
+        result.extend((zone_path, attr_name, record[field])
+                      for field, attr_name in ZONE_ARRAY_FIELDS if field in record)
+    return result
+
+
 def find_live_state_layer(stage):
-    """Return the layer in the stage's layer stack whose identifier contains 'live_state.usda'."""
+    """Return the live_state layer (.usda or .usdc) in the stage's layer stack, else None."""
+    # Deferred like pxr itself: usd_helpers imports pxr at module load
+    from usd_helpers import find_live_state_layer as find
+    return find(stage)
+
+
+# Stage-less mode (--no-stage): a manifest written by --write-manifest stands in for composition
+MANIFEST_VERSION = 3
+# Composed values the manifest records, for reads when live_state has no opinion yet
+_MANIFEST_VALUES = ((PATH_SENSOR, "state:tick"),) + tuple((PATH_PLANTS, name) for _, name in ZONE_ARRAY_FIELDS)
+
+
+def _manifest_path():
+    return os.path.join(_project_root(), "usd", "layers", "live_state.manifest.json")
+
+
+def _layer_mtimes(layers):
+    mtimes = {}
+    for layer in layers:
+        if layer.realPath:
+            mtimes[layer.realPath] = os.stat(layer.realPath).st_mtime_ns
+    return mtimes
+
+
+def build_manifest(stage, live_layer):
+    """Record the prims and attribute types update_state validates against, composed fallback values, and the layers they came from."""
+    _load_pxr()
+    # Every composed prim under the two roots, so --batch and --zone validate as they do against the stage
+    prims = []
+    types = {}
+    for root_path in (PATH_DEVICES, PATH_PLANTS):
+        root = ensure_prim(stage, _sdf_path(root_path))
+        if root is None:
+            continue
+        for prim in Usd.PrimRange(root, Usd.PrimAllPrimsPredicate):
+            prims.append(str(prim.GetPath()))
+            for attr in prim.GetAttributes():
+                types[str(attr.GetPath())] = str(attr.GetTypeName())
+    values = {}
+    for path, name in _MANIFEST_VALUES:
+        prim = stage.GetPrimAtPath(_sdf_path(path))
+        attr = prim.GetAttribute(name) if prim else None
+        value = attr.Get() if attr else None
+        if value is not None:
+            values[f"{path}.{name}"] = list(value) if isinstance(value, Vt.FloatArray) else value
+    # live_state changes on every update, so it is not part of the fingerprint
+    layers = [layer for layer in stage.GetUsedLayers() if layer != live_layer]
+    return {
+        "version": MANIFEST_VERSION,
+        "live_layer": live_layer.realPath,
+        "layers": _layer_mtimes(layers),
+        "prims": prims,
+        "types": types,
+        "values": values,
+    }
+
+
+def load_manifest():
+    """Read the --write-manifest output; raises ValueError if missing or if any source layer changed since."""
+    path = _manifest_path()
     try:
-        stack = stage.GetLayerStack()
-    except Exception:
-        return None
-    for layer in stack:
-        ident = layer.GetIdentifier() if hasattr(layer, "GetIdentifier") else str(layer)
-        if "live_state.usda" in ident:
-            return layer
-    return None
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cannot read manifest {path}: {e}. Run with --write-manifest first.") from e
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Manifest {path} is from another version. Run with --write-manifest.")
+    for layer_path, mtime in manifest["layers"].items():
+        try:
+            current = os.stat(layer_path).st_mtime_ns
+        except OSError:
+            current = None
+        if current != mtime:
+            raise ValueError(f"Manifest is stale ({layer_path} changed). Run with --write-manifest.")
+    manifest["prims"] = set(manifest["prims"])
+    return manifest
+
+
+def prim_exists(stage, manifest, path):
+    """Composed prim check, or manifest lookup when running without a stage."""
+    if stage is not None:
+        return ensure_prim(stage, path) is not None
+    return str(path) in manifest["prims"]
+
+
+def current_type(stage, live_layer, manifest, path, name):
+    """
+    Sdf.ValueTypeName of path.name if the attribute already exists (composed, or without a
+    stage the live_state spec falling back to the manifest), else None.
+    """
+    if stage is not None:
+        prim = stage.GetPrimAtPath(path)
+        attr = prim.GetAttribute(name) if prim else None
+        return attr.GetTypeName() if attr else None
+    attr_spec = live_layer.GetAttributeAtPath(path.AppendProperty(name))
+    if attr_spec:
+        return attr_spec.typeName
+    type_name = manifest["types"].get(f"{path}.{name}")
+    return Sdf.ValueTypeNames.Find(type_name) if type_name else None
+
+
+def current_value(stage, live_layer, manifest, path, name):
+    """
+    Current value of path.name: composed from the stage, or without a stage the live_state
+    opinion (strongest layer) falling back to the value recorded in the manifest.
+    """
+    if stage is not None:
+        prim = stage.GetPrimAtPath(path)
+        attr = prim.GetAttribute(name) if prim else None
+        return attr.Get() if attr else None
+    attr_spec = live_layer.GetAttributeAtPath(path.AppendProperty(name))
+    if attr_spec and attr_spec.HasDefaultValue():
+        return attr_spec.default
+    return manifest["values"].get(str(path.AppendProperty(name)))
 
 
 def ensure_prim(stage, path):
-    """Ensure prim exists at path (composed); return prim or None."""
+    """Ensure prim exists at path (an Sdf.Path, composed); return prim or None."""
     prim = stage.GetPrimAtPath(path)
     if prim and prim.IsValid():
         return prim
     return None
 
 
-def set_float_attr(prim, name, value):
-    attr = prim.CreateAttribute(name, Sdf.ValueTypeNames.Float)
-    if attr:
-        attr.Set(value)
-        return True
-    return False
-
-
-def set_bool_attr(prim, name, value):
-    attr = prim.CreateAttribute(name, Sdf.ValueTypeNames.Bool)
-    if attr:
-        attr.Set(value)
+# Attribute writes go straight to live_state as Sdf specs (safe inside Sdf.ChangeBlock).
+def _same_value(existing, value):
+    if isinstance(value, float) and isinstance(existing, float):
+        # Attributes are 32-bit floats: compare at float precision, not exactly
+        if math.isnan(value):
+            return math.isnan(existing)
+        return math.isclose(existing, value, rel_tol=1e-6, abs_tol=1e-6)
+    if isinstance(value, Vt.FloatArray):
+        return (existing is not None and len(existing) == len(value)
+                and all(_same_value(float(a), float(b)) for a, b in zip(existing, value)))
+    return existing == value
+
+
+def _set_spec(layer, prim_path, name, type_name, value):
+    """Author value on the layer's attribute spec; return False (no write) if it already holds value."""
+    attr_spec = layer.GetAttributeAtPath(prim_path.AppendProperty(name))
+    if attr_spec and attr_spec.HasDefaultValue() and _same_value(attr_spec.default, value):
+        return False
+    if not attr_spec:
+        prim_spec = Sdf.CreatePrimInLayer(layer, prim_path)
+        attr_spec = Sdf.AttributeSpec(prim_spec, name, _value_type(type_name))
+    if not attr_spec:
+        return False
+    attr_spec.default = value
+    return True
+
+
+# Value types by USD type name, resolved to Sdf.ValueTypeNames on first write
+_FLOAT = "float"
+_BOOL = "bool"
+_STRING = "string"
+_INT = "int"
+_FLOAT_ARRAY = "float[]"
+
+
+@lru_cache(maxsize=None)
+def _value_type(type_name):
+    return Sdf.ValueTypeNames.Find(type_name)
+
+# CLI arg -> attribute write, in application order:
+# (args attribute, prim path, usd attribute, value type, fixed value for flags or None, change label)
+SENSOR_UPDATES = (
+    ("temp", PATH_SENSOR, "sensor:temperatureC", _FLOAT, None, "sensor:temperatureC = {v}"),
+    ("humidity", PATH_SENSOR, "sensor:humidityPct", _FLOAT, None, "sensor:humidityPct = {v}"),
+    ("soil", PATH_SENSOR, "sensor:soilMoisturePct", _FLOAT, None, "sensor:soilMoisturePct = {v}"),
+    ("last_updated", PATH_SENSOR, "state:lastUpdated", _STRING, None, "state:lastUpdated = {v!r}"),
+)
+DEVICE_UPDATES = (
+    ("fan", PATH_FAN, "device:power", _FLOAT, None, "Fan_01 device:power = {v}"),
+    ("enable_fan", PATH_FAN, "device:enabled", _BOOL, True, "Fan_01 device:enabled = true"),
+    ("disable_fan", PATH_FAN, "device:enabled", _BOOL, False, "Fan_01 device:enabled = false"),
+    ("vent", PATH_VENT, "device:position", _FLOAT, None, "Vent_01 device:position = {v}"),
+    ("enable_vent", PATH_VENT, "device:enabled", _BOOL, True, "Vent_01 device:enabled = true"),
+    ("disable_vent", PATH_VENT, "device:enabled", _BOOL, False, "Vent_01 device:enabled = false"),
+    ("valve", PATH_VALVE, "device:flow", _FLOAT, None, "Valve_01 device:flow = {v}"),
+    ("enable_valve", PATH_VALVE, "device:enabled", _BOOL, True, "Valve_01 device:enabled = true"),
+    ("disable_valve", PATH_VALVE, "device:enabled", _BOOL, False, "Valve_01 device:enabled = false"),
+)
+# Zone rows have no fixed prim path: they apply to the --zone prim
+ZONE_UPDATES = (
+    ("zone_moisture", None, "zone:soilMoisturePct", _FLOAT, None, "zone {zone} soilMoisturePct = {v}"),
+    ("zone_light", None, "zone:lightPct", _FLOAT, None, "zone {zone} lightPct = {v}"),
+    ("zone_health", None, "zone:healthScore", _FLOAT, None, "zone {zone} healthScore = {v}"),
+    ("zone_status", None, "zone:status", _STRING, None, "zone {zone} status = {v!r}"),
+)
+
+
+def _json_bool(value):
+    if not isinstance(value, bool):  # bool("false") is True: only accept JSON true/false
+        raise TypeError(f"expected true or false, got {value!r}")
+    return value
+
+
+def _json_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):  # True is an int too
+        raise TypeError(f"expected a number, got {value!r}")
+    return float(value)
+
+
+def _json_str(value):
+    if not isinstance(value, str):
+        raise TypeError(f"expected a string, got {value!r}")
+    return value
+
+
+def _json_int(value):
+    if isinstance(value, float) and value.is_integer():  # 3.0 is fine, 2.7 is not silently truncated
+        return int(value)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"expected an integer, got {value!r}")
+    return value
+
+
+def _json_float_array(value):
+    if not isinstance(value, list):
+        raise TypeError(f"expected an array of numbers, got {value!r}")
+    return Vt.FloatArray([_json_number(x) for x in value])
+
+
+# --batch entry "type" -> (value type, converter); converters raise TypeError rather than coerce
+BATCH_TYPES = {
+    "float": (_FLOAT, _json_number),
+    "bool": (_BOOL, _json_bool),
+    "string": (_STRING, _json_str),
+    "int": (_INT, _json_int),
+    "float[]": (_FLOAT_ARRAY, _json_float_array),
+}
+
+
+def load_batch(path, stage, live_layer, manifest):
+    """
+    Read a --batch file: a JSON array of {"path", "attr", "type", "value"} entries.
+
+    Returns [(prim Sdf.Path, attr name, value type, value)]; every entry is validated
+    (prim must exist, type must match an existing attribute) before anything is written.
+    Raises ValueError.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cannot read batch {path}: {e}") from e
+    if not isinstance(entries, list):
+        raise ValueError("Batch must be a JSON array of {path, attr, type, value} objects")
+    ops = []
+    for i, entry in enumerate(entries):
+        try:
+            ops.append(_batch_op(entry, stage, live_layer, manifest))
+        except (TypeError, ValueError, RuntimeError) as e:  # RuntimeError: Tf errors
+            raise ValueError(f"Batch entry {i}: {e}") from e
+    return ops
+
+
+def _batch_op(entry, stage, live_layer, manifest):
+    """Validate one --batch entry; returns (prim Sdf.Path, attr name, value type, value)."""
+    if not isinstance(entry, dict) or set(entry) != {"path", "attr", "type", "value"}:
+        raise ValueError("expected exactly the fields path, attr, type, value")
+    for field in ("path", "attr", "type"):
+        if not isinstance(entry[field], str):
+            raise ValueError(f"{field} must be a string, got {entry[field]!r}")
+    if entry["type"] not in BATCH_TYPES:
+        raise ValueError(f"type must be one of {', '.join(BATCH_TYPES)}")
+    if not Sdf.Path.IsValidPathString(entry["path"]) or not Sdf.Path(entry["path"]).IsPrimPath():
+        raise ValueError(f"invalid prim path {entry['path']!r}")
+    if not Sdf.Path.IsValidNamespacedIdentifier(entry["attr"]):
+        raise ValueError(f"invalid attribute name {entry['attr']!r}")
+    prim_path = Sdf.Path(entry["path"])
+    if not prim_exists(stage, manifest, prim_path):
+        raise ValueError(f"prim not found: {prim_path}")
+    type_name, convert = BATCH_TYPES[entry["type"]]
+    existing = current_type(stage, live_layer, manifest, prim_path, entry["attr"])
+    if existing is not None and existing != _value_type(type_name):
+        raise ValueError(f"{prim_path}.{entry['attr']} is {existing}, not {entry['type']}")
+    try:
+        value = convert(entry["value"])
+    except TypeError as e:
+        raise ValueError(f"bad {entry['type']} value: {e}") from e
+    return prim_path, entry["attr"], type_name, value
+
+
+def apply_updates(layer, args, updates, changes, zone_path=None):
+    """Author every update row whose CLI arg was given; append (label, value, zone) per write to changes."""
+    for arg_name, prim_path, usd_name, type_name, fixed, label in updates:
+        arg = getattr(args, arg_name, None)
+        if fixed is None:
+            if arg is None:
+                continue
+            value = arg
+        elif not arg:
+            continue
+        else:
+            value = fixed
+        if _set_spec(layer, _sdf_path(prim_path or zone_path), usd_name, type_name, value):
+            changes.append((label, value, getattr(args, "zone", None)))
+
+
+def _requested(args):
+    """True if args ask for any write (even one that turned out to be a no-op)."""
+    if args.tick or args.zones_json is not None or args.batch is not None:
         return True
-    return False
+    # Identity, not `in (None, False)`: 0.0 == False, and --temp 0 is a request
+    return any(value is not None and value is not False
+               for value in (getattr(args, row[0], None)
+                             for rows in (SENSOR_UPDATES, DEVICE_UPDATES, ZONE_UPDATES) for row in rows))
 
 
-def set_string_attr(prim, name, value):
-    attr = prim.CreateAttribute(name, Sdf.ValueTypeNames.String)
-    if attr:
-        attr.Set(value)
-        return True
-    return False
+def format_changes(changes):
+    """Render apply_command's (label, value, zone) entries; formatting is deferred until output."""
+    return [label.format(v=value, zone=zone) for label, value, zone in changes]
 
 
-def set_int_attr(prim, name, value):
-    attr = prim.CreateAttribute(name, Sdf.ValueTypeNames.Int)
-    if attr:
-        attr.Set(value)
-        return True
-    return False
-
-
-def main():
+def build_parser():
     ap = argparse.ArgumentParser(
         description="Update live telemetry and actuator state in usd/layers/live_state.usda"
     )
@@ -126,15 +577,258 @@ def main():
     ap.add_argument("--zone-light", type=float, metavar="FLOAT", help="zone:lightPct")
     ap.add_argument("--zone-health", type=float, metavar="FLOAT", help="zone:healthScore (0..1)")
     ap.add_argument("--zone-status", type=str, metavar="STR", help="zone:status (ok|dry|wet|shaded|stressed)")
+    ap.add_argument("--zones-json", type=str, metavar="PATH",
+                    help="write a zone snapshot (JSON) as zone:* float[] arrays on the Plants prim and on each zone prim")
+    ap.add_argument("--daemon", action="store_true",
+                    help="keep the stage open and apply newline-delimited JSON commands (stdin or --socket)")
+    ap.add_argument("--socket", type=str, metavar="PATH",
+                    help="with --daemon: listen on this UNIX socket instead of stdin (see update_state_client.py)")
+    ap.add_argument("--save-interval", type=float, default=0.5, metavar="SECONDS",
+                    help="with --daemon: save live_state after this much idle time since the last change (0 = every command)")
+    ap.add_argument("--batch", type=str, metavar="FILE",
+                    help='apply a JSON array of {"path", "attr", "type", "value"} writes in one change block')
+    ap.add_argument("--write-manifest", action="store_true",
+                    help="open the stage once and record valid prims/values for --no-stage, then exit")
+    ap.add_argument("--no-stage", action="store_true",
+                    help="skip opening the stage: validate against the --write-manifest output and write live_state directly")
+    output = ap.add_mutually_exclusive_group()
+    output.add_argument("--quiet", action="store_true", help="print nothing on success (errors still go to stderr)")
+    output.add_argument("--json", action="store_true",
+                        help='print one JSON line {"layer": ..., "changes": [...]} instead of the text summary')
+    return ap
+
+
+def apply_command(stage, live_layer, args, manifest=None):
+    """
+    Author one set of updates (argparse-style namespace) on live_layer; returns changes (see format_changes).
+
+    stage may be None when a manifest (load_manifest) is given. Raises ValueError for an
+    invalid or missing zone or a bad --zones-json snapshot or --batch file. Does not save the layer.
+    """
+    _load_pxr()
+    zone_path = None
+    if args.zone is not None:
+        zone_path = zone_id_to_prim_path(args.zone)
+        if zone_path is None:
+            raise ValueError(f"Invalid zone id {args.zone!r}. Use format B01-A, B02-B, etc.")
+        if not prim_exists(stage, manifest, _sdf_path(zone_path)):
+            raise ValueError(f"Zone prim not found: {zone_path}")
+
+    batch = []
+    if args.batch is not None:
+        batch = load_batch(args.batch, stage, live_layer, manifest)
+
+    # The zone arrays and the per-zone attributes are written together so readers of either agree:
+    # --zones-json also writes each zone prim, and --zone also updates already-authored arrays
+    snapshot = {}
+    if args.zones_json is not None:
+        snapshot = load_zone_snapshot(args.zones_json)
+    if zone_path is not None:
+        record = {field: getattr(args, f"zone_{field}") for field, _ in ZONE_ARRAY_FIELDS}
+        record = {field: value for field, value in record.items() if value is not None}
+        if record:
+            snapshot.setdefault(zone_id_to_index(args.zone), {}).update(record)
+    zone_arrays = zone_array_values(stage, live_layer, manifest, snapshot, create=args.zones_json is not None)
+    zone_prims = zone_prim_values(stage, manifest, snapshot) if args.zones_json is not None else []
+
+    # Composed reads happen before the change block below
+    prev_tick = None
+    if args.tick:
+        prev_tick = current_value(stage, live_layer, manifest, _sdf_path(PATH_SENSOR), "state:tick")
+
+    changes = []
+
+    # All writes in one change block: a single recompose instead of one per attribute
+    with Sdf.ChangeBlock():
+        apply_updates(live_layer, args, SENSOR_UPDATES, changes)
+        # state:tick and state:lastUpdated live on Sensor_01 (not on Devices)
+        if args.tick:
+            next_val = (prev_tick if prev_tick is not None else 0) + 1
+            if _set_spec(live_layer, _sdf_path(PATH_SENSOR), "state:tick", _INT, next_val):
+                changes.append(("state:tick = {v} (incremented)", next_val, None))
+        apply_updates(live_layer, args, DEVICE_UPDATES, changes)
+        if zone_path is not None:
+            apply_updates(live_layer, args, ZONE_UPDATES, changes, zone_path=zone_path)
+        for attr_name, values, count in zone_arrays:
+            if _set_spec(live_layer, _sdf_path(PATH_PLANTS), attr_name, _FLOAT_ARRAY, Vt.FloatArray(values)):
+                changes.append((f"Plants {attr_name}[] ({{v}} zones)", count, None))
+        written = sum(_set_spec(live_layer, prim_path, attr_name, _FLOAT, value)
+                      for prim_path, attr_name, value in zone_prims)
+        if written:
+            changes.append(("zone prims: {v} zone:* attributes", written, None))
+        for prim_path, attr_name, type_name, value in batch:
+            if _set_spec(live_layer, prim_path, attr_name, type_name, value):
+                changes.append((f"{prim_path}.{attr_name} = {{v}}", value, None))
+
+    return changes
+
+
+def _command_fields(parser, skip):
+    """Map each parser dest (minus skip) to (default, converter) for JSON command values."""
+    fields = {}
+    for action in parser._actions:
+        if action.dest in skip or action.dest == "help":
+            continue
+        if isinstance(action, argparse._StoreTrueAction):
+            convert = _json_bool
+        elif action.type is float:
+            convert = _json_number
+        else:
+            convert = _json_str
+        fields[action.dest] = (action.default, convert)
+    return fields
+
+
+def _command_args(fields, line):
+    """Parse one JSON command line ({"temp": 28, "zone": "B01-A", ...}) into a namespace."""
+    cmd = json.loads(line)
+    if not isinstance(cmd, dict):
+        raise ValueError("command must be a JSON object")
+    values = {key: default for key, (default, _) in fields.items()}
+    for key, value in cmd.items():
+        key = key.replace("-", "_")
+        if key not in fields:
+            raise ValueError(f"unknown field {key!r}")
+        default, convert = fields[key]
+        if value is None and default is None:  # null = leave unset, as if omitted
+            continue
+        try:
+            values[key] = convert(value)
+        except TypeError as e:
+            raise TypeError(f"{key}: {e}") from None
+    return argparse.Namespace(**values)
+
+
+def _file_mtime(layer):
+    try:
+        return os.stat(layer.realPath).st_mtime_ns
+    except OSError:
+        return None
 
-    args = ap.parse_args()
 
+class _DebouncedSave:
+    """Save a layer once `interval` seconds pass without another change (bursts coalesce into one write)."""
+
+    def __init__(self, layer, interval, lock):
+        self._layer = layer
+        self._interval = interval
+        self._lock = lock
+        self._timer = None
+        # File mtime as of our last load/save: anything newer was written by another process
+        self._mtime = _file_mtime(layer)
+
+    def _save(self):
+        self._layer.Save()
+        self._mtime = _file_mtime(self._layer)
+
+    def reload_if_changed(self):
+        """Reload the layer if its file changed on disk since our last save; call with the lock held."""
+        mtime = _file_mtime(self._layer)
+        if mtime == self._mtime:
+            return False
+        if self._layer.dirty:
+            # Unsaved daemon changes win; the pending save overwrites the external edit
+            print(f"Warning: {self._layer.realPath} changed on disk with unsaved changes pending; keeping ours",
+                  file=sys.stderr)
+        else:
+            self._layer.Reload()
+        self._mtime = mtime
+        return True
+
+    def touch(self):
+        """Record a change; call with the lock held."""
+        if self._interval <= 0:
+            self._save()
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self._interval, self._fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+            self._save()
+
+    def flush(self):
+        """Save now if a save is pending (on shutdown)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+                self._save()
+
+
+def run_daemon(stage, live_layer, parser, socket_path=None, save_interval=0.5, manifest=None):
+    """
+    Apply JSON commands against the already-open stage until EOF (stdin) or interrupt (socket).
+
+    Each input line is one command; each reply is one JSON line
+    {"ok": true, "changes": [...]} or {"ok": false, "error": "..."}.
+    live_state is saved once save_interval seconds pass without a further change. The
+    layer handle stays open for the whole run and is only reloaded when its file is
+    modified by another process (mtime differs from our last save).
+    """
+    fields = _command_fields(parser, ("daemon", "socket", "save_interval", "quiet", "json", "no_stage", "write_manifest"))
+    # Guards the layer: commands author on it while the save timer thread serializes it
+    lock = threading.Lock()
+    saver = _DebouncedSave(live_layer, save_interval, lock)
+
+    def handle(line):
+        try:
+            args = _command_args(fields, line)
+            with lock:
+                saver.reload_if_changed()
+                changes = apply_command(stage, live_layer, args, manifest)
+                if changes:
+                    saver.touch()
+        except (ValueError, TypeError, RuntimeError) as e:  # RuntimeError: Tf errors, e.g. wrong value type
+            return {"ok": False, "error": str(e)}
+        except Exception as e:  # one bad command must not take the daemon down
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        return {"ok": True, "changes": format_changes(changes)}
+
+    if socket_path is None:
+        print("Daemon ready: reading JSON commands from stdin", file=sys.stderr)
+        try:
+            for line in sys.stdin:
+                if line.strip():
+                    print(json.dumps(handle(line)), flush=True)
+        finally:
+            saver.flush()
+        return
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode("utf-8")
+                if line.strip():
+                    self.wfile.write((json.dumps(handle(line)) + "\n").encode("utf-8"))
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    # Single-threaded server: commands are applied one at a time against the one stage
+    with socketserver.UnixStreamServer(socket_path, Handler) as server:
+        print(f"Daemon ready: listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            saver.flush()
+            os.unlink(socket_path)
+
+
+def _open_stage():
+    """Open the greenhouse stage masked to Devices/Plants; returns (stage, live_layer) or exits."""
     stage_path = _greenhouse_stage_path()
-    if not os.path.isfile(stage_path):
-        print(f"Error: Stage not found: {stage_path}", file=sys.stderr)
-        sys.exit(1)
 
-    stage = Usd.Stage.Open(stage_path)
+    # Only Devices and Plants are read or written; skip composing Structure, looks and the rest
+    mask = Usd.StagePopulationMask()
+    mask.Add(_sdf_path(PATH_DEVICES))
+    mask.Add(_sdf_path(PATH_PLANTS))
+    stage = Usd.Stage.OpenMasked(stage_path, mask)
     if not stage:
         print("Error: Failed to open stage.", file=sys.stderr)
         sys.exit(1)
@@ -144,116 +838,90 @@ def main():
         print("Error: live_state.usda not found in layer stack. Add it as the last sublayer in greenhouse.usda.", file=sys.stderr)
         sys.exit(1)
 
-    stage.SetEditTarget(Usd.EditTarget(live_layer))
-    ident = live_layer.GetIdentifier() if hasattr(live_layer, "GetIdentifier") else str(live_layer)
-    print(f"Writing to layer: {ident}")
-
-    changes = []
+    for path in (PATH_SENSOR, PATH_FAN, PATH_VENT, PATH_VALVE):
+        if ensure_prim(stage, _sdf_path(path)) is None:
+            print(f"Error: Prim not found: {path}", file=sys.stderr)
+            sys.exit(1)
+    return stage, live_layer
 
-    # Sensor
-    sensor = ensure_prim(stage, PATH_SENSOR)
-    if sensor is None:
-        print(f"Error: Prim not found: {PATH_SENSOR}", file=sys.stderr)
-        sys.exit(1)
 
-    if args.temp is not None:
-        if set_float_attr(sensor, "sensor:temperatureC", args.temp):
-            changes.append(f"sensor:temperatureC = {args.temp}")
-    if args.humidity is not None:
-        if set_float_attr(sensor, "sensor:humidityPct", args.humidity):
-            changes.append(f"sensor:humidityPct = {args.humidity}")
-    if args.soil is not None:
-        if set_float_attr(sensor, "sensor:soilMoisturePct", args.soil):
-            changes.append(f"sensor:soilMoisturePct = {args.soil}")
-    if args.last_updated is not None:
-        if set_string_attr(sensor, "state:lastUpdated", args.last_updated):
-            changes.append(f"state:lastUpdated = {args.last_updated!r}")
-    if args.tick:
-        attr = sensor.CreateAttribute("state:tick", Sdf.ValueTypeNames.Int)
-        if attr:
-            prev = attr.Get()
-            next_val = (prev if prev is not None else 0) + 1
-            attr.Set(next_val)
-            changes.append(f"state:tick = {next_val} (incremented)")
-
-    # Devices: state:tick and state:lastUpdated are in the spec on Sensor_01; we did above.
-    # If we also want them on Devices (as in current live_state.usda), we can add.
-    # Spec says "on Sensor_01" for tick and last-updated, so we only write to Sensor_01.
-
-    # Fan
-    fan = ensure_prim(stage, PATH_FAN)
-    if fan is None:
-        print(f"Error: Prim not found: {PATH_FAN}", file=sys.stderr)
-        sys.exit(1)
-    if args.fan is not None:
-        if set_float_attr(fan, "device:power", args.fan):
-            changes.append(f"Fan_01 device:power = {args.fan}")
-    if args.enable_fan:
-        if set_bool_attr(fan, "device:enabled", True):
-            changes.append("Fan_01 device:enabled = true")
-    if args.disable_fan:
-        if set_bool_attr(fan, "device:enabled", False):
-            changes.append("Fan_01 device:enabled = false")
-
-    # Vent
-    vent = ensure_prim(stage, PATH_VENT)
-    if vent is None:
-        print(f"Error: Prim not found: {PATH_VENT}", file=sys.stderr)
-        sys.exit(1)
-    if args.vent is not None:
-        if set_float_attr(vent, "device:position", args.vent):
-            changes.append(f"Vent_01 device:position = {args.vent}")
-    if args.enable_vent:
-        if set_bool_attr(vent, "device:enabled", True):
-            changes.append("Vent_01 device:enabled = true")
-    if args.disable_vent:
-        if set_bool_attr(vent, "device:enabled", False):
-            changes.append("Vent_01 device:enabled = false")
-
-    # Valve
-    valve = ensure_prim(stage, PATH_VALVE)
-    if valve is None:
-        print(f"Error: Prim not found: {PATH_VALVE}", file=sys.stderr)
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.write_manifest and args.no_stage:
+        parser.error("--write-manifest needs the stage; drop --no-stage")
+
+    # Cheap checks first, so a failing run never pays for a re-exec
+    if importlib.util.find_spec("pxr") is None:
+        print("Error: pxr (Usd, Sdf) not found. Use a Python environment with USD.", file=sys.stderr)
         sys.exit(1)
-    if args.valve is not None:
-        if set_float_attr(valve, "device:flow", args.valve):
-            changes.append(f"Valve_01 device:flow = {args.valve}")
-    if args.enable_valve:
-        if set_bool_attr(valve, "device:enabled", True):
-            changes.append("Valve_01 device:enabled = true")
-    if args.disable_valve:
-        if set_bool_attr(valve, "device:enabled", False):
-            changes.append("Valve_01 device:enabled = false")
-
-    # Zone overrides (require --zone)
-    if args.zone is not None:
-        zone_path = zone_id_to_prim_path(args.zone)
-        if zone_path is None:
-            print(f"Error: Invalid zone id {args.zone!r}. Use format B01-A, B02-B, etc.", file=sys.stderr)
+    if not args.no_stage:
+        stage_path = _greenhouse_stage_path()
+        if not os.path.isfile(stage_path):
+            print(f"Error: Stage not found: {stage_path}", file=sys.stderr)
             sys.exit(1)
-        zone_prim = ensure_prim(stage, zone_path)
-        if zone_prim is None:
-            print(f"Error: Zone prim not found: {zone_path}", file=sys.stderr)
+        # Before the stage is opened: the allocator only matters for composition, which
+        # --no-stage never does
+        _maybe_reexec_with_jemalloc()
+
+    _load_pxr()
+
+    verbose = not (args.quiet or args.json)
+    if args.no_stage:
+        stage = None
+        try:
+            manifest = load_manifest()
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
             sys.exit(1)
-        if args.zone_moisture is not None:
-            if set_float_attr(zone_prim, "zone:soilMoisturePct", args.zone_moisture):
-                changes.append(f"zone {args.zone} soilMoisturePct = {args.zone_moisture}")
-        if args.zone_light is not None:
-            if set_float_attr(zone_prim, "zone:lightPct", args.zone_light):
-                changes.append(f"zone {args.zone} lightPct = {args.zone_light}")
-        if args.zone_health is not None:
-            if set_float_attr(zone_prim, "zone:healthScore", args.zone_health):
-                changes.append(f"zone {args.zone} healthScore = {args.zone_health}")
-        if args.zone_status is not None:
-            if set_string_attr(zone_prim, "zone:status", args.zone_status):
-                changes.append(f"zone {args.zone} status = {args.zone_status!r}")
+        live_layer = Sdf.Layer.FindOrOpen(manifest["live_layer"])
+        if not live_layer:
+            print(f"Error: Failed to open {manifest['live_layer']}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        manifest = None
+        stage, live_layer = _open_stage()
+
+    ident = live_layer.GetIdentifier() if hasattr(live_layer, "GetIdentifier") else str(live_layer)
+
+    if args.write_manifest:
+        path = _manifest_path()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(build_manifest(stage, live_layer), f, indent=2)
+        print(f"Wrote {path}")
+        return
+
+    # --json/--quiet: nothing on stdout until the single final write (or none at all)
+    if args.daemon or verbose:
+        print(f"Writing to layer: {ident}", file=sys.stderr if args.daemon else sys.stdout)
+
+    if args.daemon:
+        run_daemon(stage, live_layer, parser, socket_path=args.socket, save_interval=args.save_interval,
+                   manifest=manifest)
+        return
+
+    try:
+        changes = apply_command(stage, live_layer, args, manifest)
+    except (ValueError, TypeError, RuntimeError) as e:  # RuntimeError: Tf errors, e.g. wrong value type
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if changes:
+        live_layer.Save()
+    if args.json:
+        sys.stdout.write(json.dumps({"layer": ident, "changes": format_changes(changes)}) + "\n")
+        return
+    if not verbose:
+        return
 
     if not changes:
-        print("No updates requested. Use --temp, --humidity, --fan, --zone B01-A --zone-moisture 22, etc.")
+        if _requested(args):
+            print("No changes: live_state already holds the requested values.")
+        else:
+            print("No updates requested. Use --temp, --humidity, --fan, --zone B01-A --zone-moisture 22, etc.")
         return
 
-    live_layer.Save()
-    print("Updated:", ", ".join(changes))
+    print("Updated:", ", ".join(format_changes(changes)))
     print("\nReload the stage in USD Composer to see changes.")
 
 
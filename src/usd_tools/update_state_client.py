@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Send update commands to a running `update_state.py --daemon --socket PATH`.
+
+Each command is a JSON object using update_state.py's option names
+(e.g. temp, humidity, fan, tick, zone, zone_moisture). No pxr needed.
+
+  python src/usd_tools/update_state_client.py --socket /tmp/gh.sock '{"temp": 28, "humidity": 90}'
+  python src/usd_tools/update_state_client.py --socket /tmp/gh.sock '{"zone": "B03-C", "zone_status": "dry"}'
+  cat commands.ndjson | python src/usd_tools/update_state_client.py --socket /tmp/gh.sock
+"""
+
+import argparse
+import json
+import socket
+import sys
+
+
+def send_commands(socket_path, lines):
+    """Send JSON command lines over one connection; yield each decoded reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        replies = sock.makefile("r", encoding="utf-8")
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            sock.sendall((line + "\n").encode("utf-8"))
+            yield json.loads(replies.readline())
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Send JSON update commands to update_state.py --daemon")
+    ap.add_argument("--socket", required=True, metavar="PATH", help="daemon UNIX socket path")
+    ap.add_argument("command", nargs="*", help="JSON command(s); read one per line from stdin if omitted")
+    args = ap.parse_args()
+
+    lines = args.command or sys.stdin
+    failed = False
+    for reply in send_commands(args.socket, lines):
+        if reply.get("ok"):
+            changes = reply.get("changes") or []
+            print("Updated:", ", ".join(changes) if changes else "(nothing)")
+        else:
+            failed = True
+            print(f"Error: {reply.get('error')}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()